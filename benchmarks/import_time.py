@@ -0,0 +1,66 @@
+"""Benchmark the cold-start import time of the analysis and simulation modules
+
+Every module is imported in a fresh interpreter with `python -X importtime`, without the OPENMC_*
+environment variables, so the analysis path is also checked to work without nuclear data configured.
+Run with `python benchmarks/import_time.py`, optionally followed by the modules to import.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+LAB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "starbun", "lab", "002-data-for-nn")
+
+DEFAULT_MODULES = [
+  # Analysis path, should need neither openmc nor nuclear data
+  "starbun.utils.statepoint",
+  "starbun.utils.results_index",
+  "starbun.geometries.layouts",
+  "starbun.data_for_nn.input_data",
+  # Simulation path, for reference
+  "starbun.materials.fuels",
+  "starbun.geometries.fuel_assemblies",
+  "starbun.data_for_nn.run",
+]
+
+def import_time(module: str, repeat: int):
+  """Get the best cumulative import time of a module in microseconds over repeat fresh interpreters, and its heaviest dependencies"""
+  env = {key: value for key, value in os.environ.items() if not key.startswith("OPENMC_")}
+  env["PYTHONPATH"] = os.pathsep.join(filter(None, [LAB_PATH, env.get("PYTHONPATH")]))
+
+  best = None
+  for _ in range(repeat):
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             env=env, capture_output=True, text=True, cwd=LAB_PATH)
+    if process.returncode != 0:
+      return None, process.stderr.strip().splitlines()[-1]
+
+    # Lines are "import time: self [us] | cumulative | imported package"
+    timings = []
+    for line in process.stderr.splitlines():
+      if not line.startswith("import time:") or "cumulative" in line:
+        continue
+      _, cumulative, name = line[len("import time:"):].split("|")
+      timings.append((int(cumulative), name.strip()))
+    total = next(cumulative for cumulative, name in reversed(timings) if name == module)
+    if best is None or total < best[0]:
+      top_level = sorted(((cumulative, name) for cumulative, name in timings if "." not in name and name != module), reverse=True)
+      best = (total, ", ".join(f"{name} {cumulative / 1e3:.0f} ms" for cumulative, name in top_level[:3]))
+
+  return best
+
+def main():
+  argparser = argparse.ArgumentParser()
+  argparser.add_argument("modules", help="Modules to import", nargs="*", default=DEFAULT_MODULES)
+  argparser.add_argument("-r", "--repeat", help="Number of fresh interpreters per module, the best is reported", type=int, default=3)
+  args = argparser.parse_args()
+
+  for module in args.modules:
+    total, details = import_time(module, args.repeat)
+    if total is None:
+      print(f"{module:40s} failed: {details}")
+    else:
+      print(f"{module:40s} {total / 1e3:8.1f} ms  ({details})")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,85 @@
+"""Benchmark starbun.utils.statepoint against openmc.StatePoint on a directory of synthetic statepoints
+
+Run with `python benchmarks/statepoint_reader.py`. The openmc.StatePoint part is skipped if openmc is not installed.
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+import h5py
+import numpy as np
+
+import starbun.utils.statepoint
+
+def write_synthetic_statepoint(path: str, n_batches: int = 140, n_inactive: int = 40, n_tallies: int = 20, rng=None):
+  """Write a statepoint file with the datasets of an eigenvalue run and some tallies"""
+  rng = rng or np.random.default_rng()
+  try:
+    from openmc.statepoint import _VERSION_STATEPOINT
+    version = _VERSION_STATEPOINT
+  except ImportError:
+    version = (18, 1)
+
+  with h5py.File(path, "w") as file:
+    file.attrs["filetype"] = np.bytes_("statepoint")
+    file.attrs["version"] = np.array(version)
+    file.attrs["openmc_version"] = np.array((0, 15, 0))
+    file.attrs["date_and_time"] = np.bytes_("2024-01-01 00:00:00")
+    file.attrs["path"] = np.bytes_(os.path.dirname(path))
+    file.create_dataset("run_mode", data=np.bytes_("eigenvalue"))
+    file.create_dataset("n_particles", data=1000)
+    file.create_dataset("n_batches", data=n_batches)
+    file.create_dataset("current_batch", data=n_batches)
+    file.create_dataset("n_inactive", data=n_inactive)
+    file.create_dataset("generations_per_batch", data=1)
+    file.create_dataset("seed", data=1)
+    k_generation = 1.1 + 0.01 * rng.standard_normal(n_batches)
+    file.create_dataset("k_generation", data=k_generation)
+    file.create_dataset("entropy", data=6 + 0.01 * rng.standard_normal(n_batches))
+    file.create_dataset("k_combined", data=[k_generation[n_inactive:].mean(), k_generation[n_inactive:].std() / np.sqrt(n_batches - n_inactive)])
+    runtime = file.create_group("runtime")
+    for name in ["total", "initialization", "reading cross sections", "simulation", "transport", "inactive batches", "active batches"]:
+      runtime.create_dataset(name, data=rng.random())
+    tallies = file.create_group("tallies")
+    for tally_id in range(1, n_tallies + 1):
+      tally = tallies.create_group(f"tally {tally_id}")
+      tally.create_dataset("results", data=rng.random((1000, 1, 2)))
+
+def main():
+  argparser = argparse.ArgumentParser()
+  argparser.add_argument("-n", "--n_statepoints", help="Number of synthetic statepoints", type=int, default=200)
+  argparser.add_argument("-r", "--repeat", help="Number of timed repetitions, the best is reported", type=int, default=3)
+  args = argparser.parse_args()
+
+  with tempfile.TemporaryDirectory() as directory:
+    rng = np.random.default_rng(0)
+    paths = [os.path.join(directory, f"statepoint_{i}.h5") for i in range(args.n_statepoints)]
+    for path in paths:
+      write_synthetic_statepoint(path, rng=rng)
+
+    def read_starbun():
+      return starbun.utils.statepoint.read_many(paths, ["keff", "runtime"])
+
+    starbun_time = min(timeit.repeat(read_starbun, number=1, repeat=args.repeat))
+    print(f"starbun.utils.statepoint: {starbun_time:.3f} s for {len(paths)} statepoints ({1e3 * starbun_time / len(paths):.2f} ms each)")
+
+    try:
+      import openmc
+    except ImportError:
+      print("openmc is not installed, skipping openmc.StatePoint")
+      return
+
+    def read_openmc():
+      results = []
+      for path in paths:
+        with openmc.StatePoint(path, autolink=False) as sp:
+          results.append((sp.keff.nominal_value, sp.keff.std_dev, sp.runtime["total"]))
+      return results
+
+    openmc_time = min(timeit.repeat(read_openmc, number=1, repeat=args.repeat))
+    print(f"openmc.StatePoint: {openmc_time:.3f} s for {len(paths)} statepoints ({1e3 * openmc_time / len(paths):.2f} ms each)")
+    print(f"Speedup: {openmc_time / starbun_time:.1f}x")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,60 @@
+"""Stress test starbun.utils.tracker with many processes allocating experiment numbers at the same time
+
+Every process calls get_tracker_value(increase=True) and reserve_tracker_values on a shared tracker file in a
+temporary directory. The test fails if a number is handed out twice or if the numbers have gaps.
+Run with `python benchmarks/tracker_stress.py`.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import starbun.utils.tracker
+
+def allocate(task):
+  path, n_calls, block_size, barrier = task
+  barrier.wait() # Start all processes at once to maximize contention
+  values = []
+  for call in range(n_calls):
+    if call % 2 == 0:
+      values.append(starbun.utils.tracker.get_tracker_value(increase=True, path=path))
+    else:
+      values += starbun.utils.tracker.reserve_tracker_values(block_size, path=path)
+  return values
+
+def main():
+  argparser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  argparser.add_argument("-p", "--processes", help="Number of concurrent processes", type=int, default=32)
+  argparser.add_argument("-n", "--calls", help="Number of allocations per process", type=int, default=50)
+  argparser.add_argument("-b", "--block-size", help="Number of experiment numbers per reserve_tracker_values call", type=int, default=3)
+  args = argparser.parse_args()
+
+  with tempfile.TemporaryDirectory() as directory, multiprocessing.Manager() as manager:
+    path = os.path.join(directory, starbun.utils.tracker.TRACKER_FILE)
+    barrier = manager.Barrier(args.processes)
+    start_time = time.perf_counter()
+    with multiprocessing.Pool(processes=args.processes) as pool:
+      results = pool.map(allocate, [(path, args.calls, args.block_size, barrier)] * args.processes)
+    elapsed = time.perf_counter() - start_time
+
+  values = sorted(int(value) for values in results for value in values)
+  n_expected = args.processes * (args.calls // 2 * args.block_size + (args.calls + 1) // 2)
+  assert len(values) == n_expected, f"Expected {n_expected} experiment numbers, got {len(values)}"
+  assert len(set(values)) == len(values), f"{len(values) - len(set(values))} experiment numbers were handed out more than once"
+  assert values == list(range(values[0], values[0] + len(values))), "The experiment numbers are not contiguous"
+
+  # Every block must be consecutive, e.g. for the experiments of one sweep
+  for process_values in results:
+    numbers = [int(value) for value in process_values]
+    position = 0
+    for call in range(args.calls):
+      size = 1 if call % 2 == 0 else args.block_size
+      block = numbers[position:position + size]
+      assert block == list(range(block[0], block[0] + size)), f"Block {block} is not consecutive"
+      position += size
+
+  print(f"{len(values)} unique, contiguous experiment numbers from {args.processes} processes in {elapsed:.2f} s")
+
+if __name__ == "__main__":
+  main()
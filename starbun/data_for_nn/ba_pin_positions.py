@@ -1,3 +1,5 @@
+from starbun.geometries.layouts import AssemblyLayout
+
 def get(n_ba_pins: int, lattice_size: int):
   """Gets the positions of the BA pins in the fuel assembly by placing them 
   one step from the edge of the lattice.
@@ -58,6 +60,26 @@ def get(n_ba_pins: int, lattice_size: int):
 
   return all_ba_pin_positions
   
+def get_layout(inputs):
+  """Get the layout of an experiment, from its layout input or else the BA pin positions of get
+
+  Parameters
+  ----------
+  inputs : InputData or pandas.Series
+    The inputs of the experiment, e.g. a row of ResultsIndex.to_dataframe()
+
+  Returns
+  -------
+  AssemblyLayout
+    The layout, code 1 is a BA pin
+  """
+  layout = getattr(inputs, "layout", None)
+  # A row of a DataFrame has NaN for a missing layout
+  if isinstance(layout, str):
+    return AssemblyLayout.from_string(layout)
+  lattice_size = int(inputs.lattice_size)
+  return AssemblyLayout.from_positions(get(int(inputs.n_ba_pins), lattice_size), lattice_size)
+
 def visualize(lattice_size: int, path: str):
   import matplotlib.pyplot as plt
   import numpy as np
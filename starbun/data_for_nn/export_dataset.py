@@ -0,0 +1,25 @@
+import argparse
+import starbun.utils.dataset
+from starbun.utils.results_index import ResultsIndex
+
+from starbun.data_for_nn.ba_pin_positions import get_layout
+
+import multiprocessing
+try:
+  CPU_COUNT = multiprocessing.cpu_count()
+except NotImplementedError:
+  CPU_COUNT = 1   # arbitrary default
+
+def main():
+  argparser = argparse.ArgumentParser(description="Append the finished experiments to the sharded training dataset, see starbun.utils.dataset")
+  argparser.add_argument("--path", help="Directory of the dataset", default="dataset")
+  argparser.add_argument("--shard-size", help="Number of experiments per shard of a new dataset", type=int, default=4096)
+  argparser.add_argument("--grid-size", help="Size of the padded layout grids of a new dataset", type=int, default=17)
+  args = argparser.parse_args()
+
+  writer = starbun.utils.dataset.DatasetWriter(args.path, shard_size=args.shard_size, grid_size=args.grid_size)
+  with ResultsIndex("results_index.sqlite") as index:
+    index.update("experiments", processes=CPU_COUNT)
+    n_appended = starbun.utils.dataset.export_index(index, writer, get_layout)
+
+  print(f"Appended {n_appended} experiments, {len(writer.experiments())} in total in {args.path}")
@@ -0,0 +1,46 @@
+import os
+from dataclasses import dataclass
+from starbun.utils.input_data import ExperimentInputData
+
+@dataclass
+class InputData(ExperimentInputData):
+  enrichment_pct: float = 5.0
+  lattice_pitch: float = 1.26
+  fuel_or: float = 0.45
+  clad_ir: float = 0.47
+  clad_or: float = 0.55
+  lattice_size: int = 10
+  n_ba_pins: int = 12
+  ba_pct: float = 5.0
+  layout: str | None = None # See AssemblyLayout.to_string, code 1 is a BA pin. Defaults to the positions of ba_pin_positions.get
+  symmetry: str = "auto" # Part of the assembly to model, see rectangular_lattice. 'auto' uses the largest symmetry of the layout
+  particles: int = 1000
+  seed: int | None = None # Random number seed, OpenMC uses 1 if not given. Points with the same seed use common random numbers
+  active_batches: int = 100
+  inactive_batches: int = 40
+  keff_std_target: float | None = None # Stop once the keff standard deviation is below this, active_batches is then the minimum
+  max_batches: int | None = None # Cap on the total number of batches with keff_std_target, defaults to 4*(inactive_batches + active_batches)
+  trigger_batch_interval: int = 10 # Number of batches between checks of keff_std_target
+  source_file: str | None = None # Source bank to start from instead of a uniform source, see starbun.utils.warm_start
+  source_experiment: str | None = None # Experiment that source_file comes from
+  warm_inactive_batches: int = 5 # Number of inactive batches when starting from source_file
+  sensitivities: bool = False # Tally the derivatives of keff with respect to ba_pct and enrichment_pct, see starbun.utils.sensitivity
+  energy_mode: str = "continuous-energy" # 'continuous-energy' or 'multi-group' with mgxs_library
+  mgxs_library: str | None = None # Microscopic multigroup cross sections of a multi-group run, see starbun.utils.multigroup
+  mgxs_reference: str | None = None # Experiment that mgxs_library was made from
+  mgxs_groups: str | None = None # Tally multigroup cross sections in this group structure, e.g. 'CASMO-8', for the multi-group runs of the same family
+  cross_sections: str | None = None # Defaults to $OPENMC_CROSS_SECTIONS
+
+  def __init__(self, experiment=None, *args, **kwargs):
+    self.experiment = experiment
+
+    # Check if kwargs is an empty dictionary
+    if kwargs:
+      for key, value in kwargs.items():
+        setattr(self, key, value)
+
+    # Look up the nuclear data in the environment only when it is not given, e.g. not for loaded experiments
+    if self.cross_sections is None:
+      self.cross_sections = os.environ.get('OPENMC_CROSS_SECTIONS')
+
+    super().__init__()
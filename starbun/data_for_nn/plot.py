@@ -0,0 +1,41 @@
+import timeit
+import seaborn as sns
+from starbun.utils.results_index import ResultsIndex
+from starbun.utils.convergence import suggest_inactive_batches
+
+
+import multiprocessing
+try:
+  CPU_COUNT = multiprocessing.cpu_count()
+except NotImplementedError:
+  CPU_COUNT = 1   # arbitrary default
+
+def main():
+  # Only experiments that are new or changed since the last run are read
+  with ResultsIndex("results_index.sqlite") as index:
+    n_ingested = index.update("experiments", processes=CPU_COUNT)
+    df = index.to_dataframe()
+  print(f"Ingested {n_ingested} new or changed experiments")
+
+  # Flag experiments that tallied before the fission source converged
+  with_entropy = df.dropna(subset=["entropy_converged_batch"]) if "entropy_converged_batch" in df else df.iloc[0:0]
+  if len(with_entropy) > 0:
+    not_converged = with_entropy[with_entropy["source_converged"] == 0]
+    for experiment in not_converged["experiment"]:
+      print(f"WARN: Experiment {experiment} tallied before the fission source converged")
+    print(f"Suggested number of inactive batches: {suggest_inactive_batches(with_entropy['entropy_converged_batch'])}")
+
+  # Apply the default theme
+  sns.set_style("whitegrid")
+  fig = sns.relplot(
+    data=df,
+    x="ba_pct", y="keff", col="lattice_size",
+    hue="n_ba_pins", style="n_ba_pins",
+  )
+
+  fig.savefig(f"result.png")
+  print(f"Saved figure from {len(df)} experiments")
+
+def timed_main():
+  run_time = timeit.timeit(main, number=1)
+  print(f"Run time with {CPU_COUNT} CPUs: {run_time:.1f} s")
\ No newline at end of file
@@ -0,0 +1,522 @@
+import os
+import dataclasses
+import functools
+from typing import Callable
+import numpy as np
+import argparse
+import yaml
+import openmc
+import openmc.stats
+import openmc.model
+import starbun.materials.fuels
+import starbun.materials.claddings
+import starbun.materials.moderators
+import starbun.geometries.fuel_assemblies
+from starbun.geometries.layouts import AssemblyLayout
+import starbun.utils.tracker
+import starbun.utils.sweep
+import starbun.utils.result_cache
+import starbun.utils.statepoint
+import starbun.utils.convergence
+import starbun.utils.warm_start
+import starbun.utils.in_memory
+import starbun.utils.multigroup
+import starbun.utils.sensitivity
+import starbun.utils.correlated_sampling
+import starbun.utils.results_index
+import starbun.surrogate.features
+import starbun.surrogate.active_learning
+from starbun.surrogate.keff import KeffSurrogate
+from starbun.utils.input_data import ExperimentInputData
+
+from starbun.data_for_nn import ba_pin_positions
+from starbun.data_for_nn.ba_pin_positions import get_layout
+from starbun.data_for_nn.input_data import InputData
+
+def get_symmetry(inp: InputData):
+  if inp.symmetry == "auto":
+    return get_layout(inp).symmetry()
+  return inp.symmetry
+
+def get_materials(inp: InputData):
+  materials = {
+    "uo2_no_ba": starbun.materials.fuels.uo2(enrichment_pct=inp.enrichment_pct),
+    "uo2_ba": starbun.materials.fuels.uo2(enrichment_pct=inp.enrichment_pct, gd2o3_pct=inp.ba_pct),
+    "zircaloy2": starbun.materials.claddings.zircaloy2(),
+    "water": starbun.materials.moderators.water(),
+  }
+  if inp.energy_mode == "multi-group":
+    materials = {role: starbun.utils.multigroup.mg_material(material, role) for role, material in materials.items()}
+  return materials
+
+def get_mgxs_path(inp: InputData):
+  return os.path.join(inp.results_path, "mgxs.h5")
+
+def get_sensitivity_materials(inp: InputData, materials: dict):
+  # Only the fuel materials that are in the geometry, there are no BA materials without BA pins
+  roles = ["uo2_no_ba", "uo2_ba"] if get_layout(inp).count() > 0 else ["uo2_no_ba"]
+  return {role: materials[role] for role in roles}
+
+def get_sensitivities(inp: InputData, sp_path: str, materials: dict):
+  """Get the sensitivities of keff to ba_pct and enrichment_pct from the derivative tallies, and write them to results/sensitivity.yaml"""
+  sensitivity_materials = get_sensitivity_materials(inp, materials)
+  sensitivities = starbun.utils.sensitivity.read_sensitivities(sp_path, sensitivity_materials)
+
+  uo2 = starbun.materials.fuels.uo2
+  gradients = {
+    "ba_pct": {"uo2_ba": starbun.utils.sensitivity.composition_gradient(lambda x: uo2(enrichment_pct=inp.enrichment_pct, gd2o3_pct=x), inp.ba_pct, 0.1)},
+    "enrichment_pct": {
+      "uo2_no_ba": starbun.utils.sensitivity.composition_gradient(lambda x: uo2(enrichment_pct=x), inp.enrichment_pct, 0.1),
+      "uo2_ba": starbun.utils.sensitivity.composition_gradient(lambda x: uo2(enrichment_pct=x, gd2o3_pct=inp.ba_pct), inp.enrichment_pct, 0.1),
+    },
+  }
+
+  parameter_sensitivities = {}
+  for parameter, parameter_gradients in gradients.items():
+    sensitivity = starbun.utils.sensitivity.parameter_sensitivity(sensitivities, parameter_gradients)
+    parameter_sensitivities[parameter] = None if sensitivity is None else {"value": sensitivity[0], "std": sensitivity[1]}
+    if sensitivity is None:
+      print(f"WARN: Experiment {inp.experiment}: dk/d{parameter} can not be computed, a nuclide it changes is not in the fuel")
+
+  with open(os.path.join(inp.results_path, "sensitivity.yaml"), "w") as file:
+    yaml.safe_dump({
+      "parameters": parameter_sensitivities,
+      "materials": {role: {variable: {"value": value, "std": std} for variable, (value, std) in role_sensitivities.items()}
+                    for role, role_sensitivities in sensitivities.items()},
+    }, file, sort_keys=False)
+  return parameter_sensitivities
+
+def copy_input(inp: InputData, **changes):
+  """Create a new experiment with the same inputs as inp, apart from changes"""
+  bookkeeping_fields = {field.name for field in dataclasses.fields(ExperimentInputData)}
+  kwargs = {field.name: getattr(inp, field.name) for field in dataclasses.fields(inp) if field.name not in bookkeeping_fields}
+  new_inp = InputData(**{**kwargs, **changes})
+  new_inp.to_yaml_file(f'{new_inp.experiment_path}/input_data.yaml')
+  return new_inp
+
+def get_geometry(inp: InputData, materials: dict = None):
+  materials = materials or get_materials(inp)
+  uo2_no_ba, uo2_ba, zircaloy2, water = materials["uo2_no_ba"], materials["uo2_ba"], materials["zircaloy2"], materials["water"]
+
+  layout = get_layout(inp)
+  layout.palette = [uo2_no_ba, uo2_ba]
+
+  universe = starbun.geometries.fuel_assemblies.rectangular_lattice(inp.lattice_size, inp.lattice_pitch, inp.fuel_or, layout, inp.clad_ir, inp.clad_or, zircaloy2, water, boundary_type='reflective', symmetry=get_symmetry(inp))
+
+  colors = {uo2_no_ba: 'seagreen', uo2_ba: 'firebrick', zircaloy2: 'gray', water: 'cornflowerblue'}
+  plot_geometry(inp, universe, colors)
+
+  geometry = openmc.Geometry(universe)
+  return geometry
+
+def plot_geometry(inp: InputData, universe: openmc.Universe, colors: dict):  
+  import matplotlib.pyplot as plt
+
+  # Increase font size for better visibility with large pixel counts
+  original_font_size = plt.rcParams['font.size']
+  plt.rcParams.update({'font.size': 50})
+
+  universe.plot(colors=colors, color_by='material', pixels=(2000,2000), legend=True)
+  plt.tight_layout()
+  plt.savefig(f'{inp.img_path}/{inp.lattice_size}x{inp.lattice_size}_fuel-map_{inp.n_ba_pins}-pins.png')
+  plt.close()
+
+  # Restore font size
+  plt.rcParams.update({'font.size': original_font_size})
+
+def get_settings(inp: InputData):
+  settings = openmc.Settings()
+  settings.energy_mode = inp.energy_mode
+  settings.particles = inp.particles
+  if inp.seed is not None:
+    settings.seed = inp.seed
+  settings.batches = inp.active_batches + inp.inactive_batches
+  settings.inactive = inp.inactive_batches
+
+  if inp.keff_std_target is not None:
+    # Run active_batches first, then keep going until the keff standard deviation reaches the target or max_batches is reached
+    settings.keff_trigger = {'type': 'std_dev', 'threshold': inp.keff_std_target}
+    settings.trigger_active = True
+    settings.trigger_batch_interval = inp.trigger_batch_interval
+    settings.trigger_max_batches = inp.max_batches if inp.max_batches is not None else 4 * settings.batches
+
+  # Start from the source of a neighbouring run if there is one, otherwise uniformly over the fuel.
+  # Track the source convergence with one entropy bin per pin.
+  if inp.source_file is not None:
+    settings.source = openmc.FileSource(inp.source_file)
+  else:
+    settings.source = starbun.geometries.fuel_assemblies.fissionable_source(inp.lattice_size, inp.lattice_pitch, get_symmetry(inp))
+  settings.entropy_mesh = starbun.geometries.fuel_assemblies.entropy_mesh(inp.lattice_size, inp.lattice_pitch, get_symmetry(inp))
+
+  # Write the final source bank, so that neighbouring runs can start from it
+  settings.sourcepoint = {'separate': True, 'write': True}
+  return settings
+
+def get_family(inp: InputData):
+  # Runs with the same geometry and layout have similar fission sources
+  return f"{inp.lattice_size}:{inp.lattice_pitch}:{inp.fuel_or}:{inp.clad_ir}:{inp.clad_or}:{get_layout(inp).canonical().to_string()}:{get_symmetry(inp)}"
+
+def get_warm_start_parameters(inp: InputData):
+  return {"ba_pct": inp.ba_pct, "enrichment_pct": inp.enrichment_pct}
+
+def get_cache_key(inp: InputData, cache: starbun.utils.result_cache.ResultCache):
+  layout = get_layout(inp).canonical()
+  # The BA percentage does not matter without BA pins
+  if layout.count() == 0:
+    return cache.key(inp, layout=layout.to_string(), ba_pct=None)
+  return cache.key(inp, layout=layout.to_string())
+
+def run_point(inp: InputData, threads: int, cache: starbun.utils.result_cache.ResultCache = None,
+              source_registry: starbun.utils.warm_start.SourceRegistry = None,
+              in_memory: starbun.utils.in_memory.InMemoryModel = None):
+  if cache is not None:
+    # Looked up with the cold-start inputs, a cold-start result also serves a point that would be warm-started
+    entry = cache.get(get_cache_key(inp, cache))
+    if entry is not None:
+      sp_path = cache.restore(entry, inp.cwd_path)
+      print(f"Experiment {inp.experiment}: reusing the result of experiment {entry['experiment']}")
+      if inp.sensitivities:
+        # sensitivities is part of the key, so the cached statepoint has the derivative tallies
+        get_sensitivities(inp, sp_path, get_materials(inp))
+      return entry["keff"], entry["keff_std"]
+
+  warm_started = False
+  if source_registry is not None:
+    neighbour = source_registry.nearest(get_family(inp), get_warm_start_parameters(inp))
+    if neighbour is not None:
+      inp.source_file = neighbour["source"]
+      inp.source_experiment = neighbour["experiment"]
+      inp.inactive_batches = inp.warm_inactive_batches
+      warm_started = True
+      inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+      print(f"Experiment {inp.experiment}: starting from the source of experiment {inp.source_experiment}")
+
+  materials = get_materials(inp)
+  if in_memory is not None and in_memory.compatible(get_family(inp), materials):
+    # Only the compositions differ from the loaded model
+    sp_path = in_memory.run(inp.cwd_path, materials)
+  else:
+    geometry = get_geometry(inp, materials)
+    settings = get_settings(inp)
+
+    model = openmc.model.Model(geometry=geometry, settings=settings)
+
+    mgxs_library = None
+    if inp.mgxs_groups is not None:
+      # Tally the cross sections of every material for the multi-group runs of this family
+      mgxs_library = starbun.utils.multigroup.build_library(geometry, inp.mgxs_groups)
+      model.tallies = openmc.Tallies()
+      mgxs_library.add_to_tallies_file(model.tallies, merge=True)
+    if inp.sensitivities:
+      model.tallies.extend(starbun.utils.sensitivity.derivative_tallies(get_sensitivity_materials(inp, materials)))
+    if inp.energy_mode == "multi-group":
+      model.materials = openmc.Materials(geometry.get_all_materials().values())
+      model.materials.cross_sections = os.path.abspath(inp.mgxs_library)
+
+    if in_memory is not None:
+      in_memory.load(get_family(inp), model, materials, inp.cwd_path)
+      sp_path = in_memory.run(inp.cwd_path)
+    else:
+      sp_path = model.run(cwd=inp.cwd_path, threads=threads)
+
+    if mgxs_library is not None:
+      starbun.utils.multigroup.export_library(mgxs_library, sp_path, materials, get_mgxs_path(inp))
+
+  if inp.sensitivities:
+    get_sensitivities(inp, sp_path, materials)
+
+  source_path = starbun.utils.warm_start.find_source(inp.cwd_path)
+  if source_registry is not None and source_path is not None:
+    source_registry.register(get_family(inp), get_warm_start_parameters(inp), source_path, inp.experiment)
+
+  # The achieved standard deviation and number of batches are also recorded by the results index
+  results = starbun.utils.statepoint.read(sp_path, ["keff", "current_batch"])
+  print(f"Experiment {inp.experiment}: keff = {results['keff']:.5f} +- {results['keff_std']:.5f} after {results['current_batch']} batches")
+
+  convergence = starbun.utils.convergence.check_convergence(sp_path)
+  if convergence["source_converged"] is False:
+    print(f"WARN: Experiment {inp.experiment}: the fission source converged at batch {convergence['entropy_converged_batch']}, "
+          f"after the {convergence['n_inactive']} inactive batches")
+
+  if cache is not None and not warm_started:
+    # A warm-started result is not stored, since it is not a cold-start one, and the lookup above only uses the
+    # cold-start key, so it would never be hit and would only push reachable entries out of the cache
+    cache.put(get_cache_key(inp, cache), sp_path, results["keff"], results["keff_std"], inp.experiment)
+
+  return results["keff"], results["keff_std"]
+
+def run_family(inps: list[InputData], threads: int, cache: starbun.utils.result_cache.ResultCache = None):
+  """Run points with the same geometry in one openmc.lib instance, changing only the material compositions between them"""
+  if len(inps) == 1:
+    return [run_point(inps[0], threads, cache)]
+
+  # Load the point with the most nuclides first, so that e.g. the points without Gd reuse the model with Gd
+  inps = sorted(inps, key=lambda inp: starbun.utils.in_memory.count_nuclides(get_materials(inp)), reverse=True)
+  with starbun.utils.in_memory.InMemoryModel(threads=threads) as in_memory:
+    return [run_point(inp, threads, cache, in_memory=in_memory) for inp in inps]
+
+def run_multigroup_family(inps: list[InputData], threads: int, cache: starbun.utils.result_cache.ResultCache = None,
+                          groups: str = "CASMO-8", n_check_points: int = 2):
+  """Run points with the same geometry in multigroup mode, with cross sections from one continuous-energy reference
+
+  The reference is the point with the median BA percentage among those with the most nuclides, so that the
+  library has data for every nuclide of the family. It is run in continuous-energy mode with MGXS tallies,
+  the other points in multigroup mode. n_check_points of them, spread over the BA percentage, are also run
+  in continuous-energy mode to measure the bias of the multigroup keff.
+
+  Returns
+  -------
+  list of dict
+    The multigroup and continuous-energy keff of every check point
+  """
+  if len(inps) == 1:
+    run_point(inps[0], threads, cache)
+    return []
+
+  n_nuclides = {inp.experiment: starbun.utils.in_memory.count_nuclides(get_materials(inp)) for inp in inps}
+  candidates = sorted((inp for inp in inps if n_nuclides[inp.experiment] == max(n_nuclides.values())), key=lambda inp: inp.ba_pct)
+  reference = candidates[len(candidates) // 2]
+
+  # The reference must be run to get its tallies, so it does not use the cache
+  reference.mgxs_groups = groups
+  reference.to_yaml_file(f'{reference.experiment_path}/input_data.yaml')
+  run_point(reference, threads)
+  mgxs_library = os.path.abspath(get_mgxs_path(reference))
+
+  mg_inps = sorted((inp for inp in inps if inp is not reference), key=lambda inp: (inp.ba_pct, inp.enrichment_pct))
+  mg_keffs = {}
+  for inp in mg_inps:
+    inp.energy_mode = "multi-group"
+    inp.mgxs_library = mgxs_library
+    inp.mgxs_reference = reference.experiment
+    inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+    mg_keffs[inp.experiment] = run_point(inp, threads, cache)
+
+  check_indices = sorted(set(np.linspace(0, len(mg_inps) - 1, min(n_check_points, len(mg_inps))).round().astype(int)))
+  bias = []
+  for inp in [mg_inps[i] for i in check_indices]:
+    ce_inp = copy_input(inp, energy_mode="continuous-energy", mgxs_library=None, mgxs_reference=None)
+    ce_keff, ce_keff_std = run_point(ce_inp, threads, cache)
+    mg_keff, mg_keff_std = mg_keffs[inp.experiment]
+    bias.append({
+      "experiment": inp.experiment,
+      "ce_experiment": ce_inp.experiment,
+      "mgxs_reference": reference.experiment,
+      "ba_pct": float(inp.ba_pct),
+      "enrichment_pct": float(inp.enrichment_pct),
+      "keff_mg": float(mg_keff),
+      "keff_ce": float(ce_keff),
+      "bias_pcm": float((mg_keff - ce_keff) * 1e5),
+      "sigma_pcm": float(np.hypot(mg_keff_std, ce_keff_std) * 1e5),
+    })
+  return bias
+
+def report_multigroup_bias(bias: list[dict], path: str = "mg_bias.yaml"):
+  """Print the bias of the multigroup keff at the check points and write it to a yaml file"""
+  with open(path, "w") as file:
+    yaml.safe_dump(bias, file, sort_keys=False)
+  if not bias:
+    return
+
+  bias_pcm = np.array([point["bias_pcm"] for point in bias])
+  print(f"Multigroup vs continuous-energy keff over {len(bias)} check points: mean {bias_pcm.mean():.0f} pcm, "
+        f"max |bias| {np.abs(bias_pcm).max():.0f} pcm, see {path}")
+
+def report_correlated_sampling(inputs: list[InputData], path: str = "correlated_sampling.yaml"):
+  """Measure the variance reduction of the keff differences between neighbouring BA percentages of the same geometry"""
+  families = {}
+  for inp in inputs:
+    # Without BA pins the BA percentage changes nothing, so the pairs would be the same run twice
+    if get_layout(inp).count() == 0:
+      continue
+    families.setdefault((get_family(inp), inp.enrichment_pct), []).append(inp)
+
+  pairs = []
+  for family_inputs in families.values():
+    family_inputs = sorted(family_inputs, key=lambda inp: inp.ba_pct)
+    for inp_a, inp_b in zip(family_inputs[:-1], family_inputs[1:]):
+      statepoint_a = starbun.utils.results_index.find_statepoint(inp_a.cwd_path)
+      statepoint_b = starbun.utils.results_index.find_statepoint(inp_b.cwd_path)
+      if statepoint_a is None or statepoint_b is None:
+        continue
+      if os.path.samefile(statepoint_a, statepoint_b):
+        # Both were restored from the same cache entry
+        continue
+      pair = starbun.utils.correlated_sampling.compare_statepoints(statepoint_a, statepoint_b)
+      pair.update({"experiment_a": inp_a.experiment, "experiment_b": inp_b.experiment, "ba_pct_a": inp_a.ba_pct, "ba_pct_b": inp_b.ba_pct})
+      pairs.append(pair)
+
+  with open(path, "w") as file:
+    yaml.safe_dump(pairs, file, sort_keys=False)
+
+  # Pairs with identical batch keffs have no variance reduction to measure
+  pairs = [pair for pair in pairs if pair["variance_reduction"] is not None]
+  if not pairs:
+    return
+
+  variance_reduction = np.median([pair["variance_reduction"] for pair in pairs])
+  print(f"Correlated sampling over {len(pairs)} pairs: median variance reduction of delta k {variance_reduction:.1f}x, "
+        f"median batch correlation {np.median([pair['correlation'] for pair in pairs]):.2f}, see {path}")
+  if variance_reduction > 1:
+    print(f"The particles per point can be cut by about {variance_reduction:.1f}x for the same delta k uncertainty as independent runs")
+
+# Parameters of the sweep, discrete values or a (low, high) range
+SWEEP_SPACE = {"n_ba_pins": [0, 4, 8, 12, 16], "ba_pct": (0.0, 8.0), "lattice_size": [8, 10, 12]}
+N_BA_PCT = 17 # Number of BA percentages of the full sweep
+
+def get_point_inputs(n_ba_pins: int, ba_pct: float, lattice_size: int):
+  """Get the InputData arguments of a sweep point, with the default pin dimensions for every lattice size"""
+  # Store the canonical layout, so that rotated or mirrored layouts are recognized as the same experiment
+  layout = AssemblyLayout.from_positions(ba_pin_positions.get(n_ba_pins, lattice_size), lattice_size).canonical()
+  inputs = dict(n_ba_pins=int(n_ba_pins), ba_pct=float(ba_pct), lattice_size=int(lattice_size), layout=layout.to_string())
+  return inputs
+
+def get_surrogate_inputs(points: list[dict], get_point_inputs: Callable = get_point_inputs):
+  """Get the layouts and scalars of sweep points for the keff surrogate, without creating experiments"""
+  inputs = [get_point_inputs(**point) for point in points]
+  layouts = [AssemblyLayout.from_string(kwargs["layout"]) for kwargs in inputs]
+  scalars = {name: [kwargs.get(name, getattr(InputData, name)) for kwargs in inputs] for name in starbun.surrogate.features.SCALAR_NAMES}
+  return layouts, scalars
+
+def run_active_learning(args, settings_kwargs: dict, cache: starbun.utils.result_cache.ResultCache = None,
+                        get_point_inputs: Callable = get_point_inputs, surrogate_path: str = "surrogate.npz", history_path: str = "active_learning.yaml"):
+  """Run the sweep points chosen by starbun.surrogate.active_learning instead of the full grid
+
+  The surrogate continues from the one saved at surrogate_path, e.g. by surrogate.py, and is first trained on
+  the stored experiments it has not seen, so that saving it again loses nothing.
+  """
+  if os.path.isfile(surrogate_path):
+    surrogate = KeffSurrogate.load(surrogate_path)
+  else:
+    surrogate = KeffSurrogate(noise_std=args.target_std / 2)
+  assert surrogate.noise_std < args.target_std, \
+    f"--target-std must be above the model error {surrogate.noise_std} of the surrogate in {surrogate_path}"
+
+  with starbun.utils.results_index.ResultsIndex("results_index.sqlite") as index:
+    index.update("experiments", processes=starbun.utils.sweep.get_cpu_count())
+    n_stored = surrogate.update_from_index(index, get_layout)
+  print(f"Starting from a surrogate trained on {surrogate.n_observations} experiments, {n_stored} of them new from the results index")
+
+  def evaluate(points):
+    inputs = []
+    for experiment, point in zip(starbun.utils.tracker.reserve_tracker_values(len(points)), points):
+      inp = InputData(experiment, **get_point_inputs(**point), **settings_kwargs)
+      inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+      inputs.append(inp)
+    results = starbun.utils.sweep.run_sweep(inputs, functools.partial(run_point, cache=cache), processes=args.processes, threads=args.threads)
+    # So that surrogate.py does not train on these experiments again
+    surrogate.experiments.update(inp.experiment for inp in inputs)
+    return np.array([result.result[0] for result in results]), np.array([result.result[1] for result in results])
+
+  surrogate, history = starbun.surrogate.active_learning.run_active_learning(
+    SWEEP_SPACE, evaluate, functools.partial(get_surrogate_inputs, get_point_inputs=get_point_inputs), surrogate, n_initial=args.initial_points, batch_size=args.batch_size,
+    target_std=args.target_std, max_points=args.max_points)
+  surrogate.save(surrogate_path)
+  with open(history_path, "w") as file:
+    yaml.safe_dump(history, file, sort_keys=False)
+
+  if not history:
+    print(f"No points left to run, saved the surrogate to {surrogate_path}")
+    return
+  n_grid = len(SWEEP_SPACE["n_ba_pins"]) * N_BA_PCT * len(SWEEP_SPACE["lattice_size"])
+  print(f"Ran {history[-1]['n_points']} points instead of the {n_grid} of the full sweep, saved the surrogate to {surrogate_path}")
+
+def main(get_point_inputs: Callable = get_point_inputs):
+  """Run the sweep of a data-for-nn lab, with get_point_inputs giving the InputData arguments of every point"""
+  argparser = argparse.ArgumentParser()
+  argparser.add_argument("-p", "--processes", help="Number of concurrent OpenMC runs, chosen automatically if not given", type=int)
+  argparser.add_argument("-t", "--threads", help="Number of OpenMP threads per OpenMC run, chosen automatically if not given", type=int)
+  argparser.add_argument("--keff-std-target", help="Run every point until the keff standard deviation is below this", type=float)
+  argparser.add_argument("--max-batches", help="Maximum total number of batches per point with --keff-std-target", type=int)
+  argparser.add_argument("--min-active-batches", help="Minimum number of active batches per point with --keff-std-target", type=int, default=20)
+  argparser.add_argument("--warm-start", help="Start every point from the final source of the nearest finished point with the same geometry and layout", action="store_true")
+  argparser.add_argument("--in-memory", help="Run the points with the same geometry in one OpenMC instance, only changing the material compositions between them", action="store_true")
+  argparser.add_argument("--sensitivities", help="Tally the derivatives of keff with respect to the BA percentage and enrichment, written to results/sensitivity.yaml", action="store_true")
+  argparser.add_argument("--multigroup", help="Run one continuous-energy reference per geometry with MGXS tallies and the other points in multigroup mode", action="store_true")
+  argparser.add_argument("--mg-groups", help="Energy group structure of the multigroup mode, see openmc.mgxs.GROUP_STRUCTURES", default="CASMO-8")
+  argparser.add_argument("--mg-check-points", help="Number of points per geometry also run in continuous-energy mode to measure the multigroup bias", type=int, default=2)
+  argparser.add_argument("--correlated", help="Use this random number seed for all points, so that keff differences between points have less noise", type=int, metavar="SEED")
+  argparser.add_argument("--independent", help="Use a different random number seed for every point, to compare with --correlated", action="store_true")
+  argparser.add_argument("--active-learning", help="Choose the points with a keff surrogate, running batches where it is least certain until --target-std is reached", action="store_true")
+  argparser.add_argument("--target-std", help="Target standard deviation of the surrogate keff over the whole sweep with --active-learning", type=float, default=1e-3)
+  argparser.add_argument("--initial-points", help="Number of points of the initial Latin hypercube design with --active-learning", type=int, default=15)
+  argparser.add_argument("--batch-size", help="Number of points per batch with --active-learning", type=int, default=8)
+  argparser.add_argument("--max-points", help="Maximum number of points with --active-learning", type=int, default=120)
+  argparser.add_argument("--no-cache", help="Always run OpenMC, even if an identical experiment has already been simulated", action="store_true")
+  argparser.add_argument("--clear-cache", help="Remove all cached results before running", action="store_true")
+  argparser.add_argument("--cache-max-entries", help="Maximum number of cached results to keep, least recently used are removed first", type=int)
+  args = argparser.parse_args()
+  if args.in_memory and args.warm_start:
+    # The source of an in-memory model is fixed when it is loaded
+    argparser.error("--in-memory cannot be combined with --warm-start")
+  if args.multigroup and (args.in_memory or args.warm_start):
+    argparser.error("--multigroup cannot be combined with --in-memory or --warm-start")
+  if args.correlated is not None and (args.independent or args.warm_start or args.keff_std_target is not None):
+    # Common random numbers need the same seed, source and number of batches in every point
+    argparser.error("--correlated cannot be combined with --independent, --warm-start or --keff-std-target")
+  if args.sensitivities and args.multigroup:
+    # OpenMC only has derivative tallies in continuous-energy mode
+    argparser.error("--sensitivities cannot be combined with --multigroup")
+  if args.active_learning and (args.multigroup or args.in_memory or args.warm_start or args.independent):
+    # The batches are chosen one after the other, so there are no families to group the points in
+    argparser.error("--active-learning cannot be combined with --multigroup, --in-memory, --warm-start or --independent")
+
+  cache = None
+  if not args.no_cache:
+    cache = starbun.utils.result_cache.ResultCache(max_entries=args.cache_max_entries)
+    if args.clear_cache:
+      cache.clear()
+
+  settings_kwargs = {}
+  if args.keff_std_target is not None:
+    settings_kwargs = dict(keff_std_target=args.keff_std_target, max_batches=args.max_batches, active_batches=args.min_active_batches)
+  if args.sensitivities:
+    settings_kwargs["sensitivities"] = True
+  if args.correlated is not None:
+    settings_kwargs["seed"] = args.correlated
+
+  if args.active_learning:
+    run_active_learning(args, settings_kwargs, cache, get_point_inputs)
+    return
+
+  # Create all experiments up front, with one block of experiment numbers reserved for the whole sweep
+  points = [(n_ba_pins, ba_pct, lattice_size) for n_ba_pins in SWEEP_SPACE["n_ba_pins"]
+            for ba_pct in np.linspace(*SWEEP_SPACE["ba_pct"], N_BA_PCT) for lattice_size in SWEEP_SPACE["lattice_size"]]
+  experiments = starbun.utils.tracker.reserve_tracker_values(len(points))
+  inputs = []
+  for experiment, (n_ba_pins, ba_pct, lattice_size) in zip(experiments, points):
+    inp = InputData(experiment, **get_point_inputs(n_ba_pins, ba_pct, lattice_size), **settings_kwargs)
+    if args.independent:
+      inp.seed = int(inp.experiment) + 1
+
+    # Save the input data as a yaml file
+    inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+
+    # ba_pin_positions.visualize(inp.lattice_size, inp.img_path)
+
+    inputs.append(inp)
+
+  source_registry = None
+  if args.warm_start:
+    source_registry = starbun.utils.warm_start.SourceRegistry()
+    inputs = starbun.utils.warm_start.order_for_warm_start(inputs, get_family, get_warm_start_parameters)
+
+  if args.multigroup:
+    families = {}
+    for inp in inputs:
+      families.setdefault(get_family(inp), []).append(inp)
+    print(f"Running {len(inputs)} points in {len(families)} multigroup families")
+    results = starbun.utils.sweep.run_sweep(list(families.values()), functools.partial(run_multigroup_family, cache=cache, groups=args.mg_groups, n_check_points=args.mg_check_points),
+                                            processes=args.processes, threads=args.threads)
+    report_multigroup_bias([point for result in results for point in result.result])
+  elif args.in_memory:
+    families = {}
+    for inp in inputs:
+      families.setdefault(get_family(inp), []).append(inp)
+    print(f"Running {len(inputs)} points in {len(families)} in-memory families")
+    starbun.utils.sweep.run_sweep(list(families.values()), functools.partial(run_family, cache=cache), processes=args.processes, threads=args.threads)
+  else:
+    starbun.utils.sweep.run_sweep(inputs, functools.partial(run_point, cache=cache, source_registry=source_registry), processes=args.processes, threads=args.threads)
+
+  if args.correlated is not None or args.independent:
+    report_correlated_sampling(inputs)
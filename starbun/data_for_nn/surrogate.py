@@ -0,0 +1,41 @@
+import os
+import argparse
+import numpy as np
+from starbun.utils.results_index import ResultsIndex
+from starbun.surrogate.keff import KeffSurrogate
+
+from starbun.data_for_nn.ba_pin_positions import get_layout
+
+import multiprocessing
+try:
+  CPU_COUNT = multiprocessing.cpu_count()
+except NotImplementedError:
+  CPU_COUNT = 1   # arbitrary default
+
+SURROGATE_PATH = "surrogate.npz"
+
+def main():
+  argparser = argparse.ArgumentParser(description="Train the keff surrogate on the experiments it has not seen yet")
+  argparser.add_argument("--retrain", help="Start from an untrained surrogate instead of the saved one", action="store_true")
+  argparser.add_argument("--noise-std", help="Model error of keff of a new surrogate, must be below the --target-std of run.py --active-learning", type=float, default=5e-4)
+  args = argparser.parse_args()
+
+  if os.path.isfile(SURROGATE_PATH) and not args.retrain:
+    surrogate = KeffSurrogate.load(SURROGATE_PATH)
+  else:
+    surrogate = KeffSurrogate(noise_std=args.noise_std)
+
+  with ResultsIndex("results_index.sqlite") as index:
+    index.update("experiments", processes=CPU_COUNT)
+    n_trained = surrogate.update_from_index(index, get_layout)
+    df = index.to_dataframe()
+  print(f"Trained on {n_trained} new experiments, {surrogate.n_observations} in total")
+  if surrogate.n_observations == 0:
+    return
+  surrogate.save(SURROGATE_PATH)
+
+  # Residuals on the training data, a lower bound of the error on new assemblies
+  df = df[df["experiment"].isin(surrogate.experiments)]
+  keff, keff_std = surrogate.predict([get_layout(row) for _, row in df.iterrows()], df)
+  residual = keff - df["keff"].to_numpy()
+  print(f"RMS residual: {np.sqrt(np.mean(residual**2)) * 1e5:.0f} pcm, mean predicted std: {np.mean(keff_std) * 1e5:.0f} pcm")
@@ -0,0 +1,294 @@
+import math
+from typing import Callable, Iterable
+
+import numpy as np
+
+from starbun.geometries.layouts import AssemblyLayout
+
+def symmetry_orbits(lattice_size: int, symmetry: str = "d4"):
+  """Partition the lattice positions into orbits under a symmetry group
+
+  Parameters
+  ----------
+  lattice_size : int
+    Number of pins along a side of the lattice
+  symmetry : str
+    'd4' (rotations and mirroring, 8-fold), 'c4' (rotations only, 4-fold), 'd2' (mirroring about both axes, 4-fold) or 'none'
+
+  Returns
+  -------
+  list of list of tuple
+    The positions (i, j) of each orbit. Placing BA pins on whole orbits gives a layout with the symmetry.
+  """
+  assert symmetry in ("d4", "c4", "d2", "none"), "symmetry must be 'd4', 'c4', 'd2' or 'none'"
+  n = lattice_size
+
+  def images(i, j):
+    rotations = [(i, j), (j, n - 1 - i), (n - 1 - i, n - 1 - j), (n - 1 - j, i)]
+    if symmetry == "none":
+      return [(i, j)]
+    elif symmetry == "c4":
+      return rotations
+    elif symmetry == "d2":
+      return [(i, j), (i, n - 1 - j), (n - 1 - i, j), (n - 1 - i, n - 1 - j)]
+    else:
+      return rotations + [(i, n - 1 - j) for i, j in rotations]
+
+  seen = set()
+  orbits = []
+  for i in range(n):
+    for j in range(n):
+      if (i, j) in seen:
+        continue
+      orbit = sorted(set(images(i, j)))
+      seen.update(orbit)
+      orbits.append(orbit)
+  return orbits
+
+def not_adjacent(diagonal: bool = True):
+  """Constraint: no BA pin next to another BA pin, including diagonal neighbours if diagonal is True"""
+  offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+  if diagonal:
+    offsets += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+  def constraint(grid: np.ndarray):
+    n = grid.shape[0]
+    padded = np.pad(grid, 1)
+    return not any(np.any(grid & padded[1 + di:1 + di + n, 1 + dj:1 + dj + n]) for di, dj in offsets)
+
+  return constraint
+
+def not_on_edge(margin: int = 1):
+  """Constraint: no BA pin within margin positions from the edge of the lattice"""
+  def constraint(grid: np.ndarray):
+    return not (grid[:margin].any() or grid[-margin:].any() or grid[:, :margin].any() or grid[:, -margin:].any())
+
+  return constraint
+
+def peaking_proxy(grid: np.ndarray, diffusion_length: float = 1.5, absorption_strength: float = 0.2):
+  """Cheap proxy of the pin power peaking factor of a BA layout, lower is better
+
+  The thermal flux depression around every BA pin is modelled as absorption_strength*exp(-d/diffusion_length),
+  with d the distance in pitches. Mirror images of the BA pins in the neighbouring assemblies are included,
+  as the assembly has reflective boundaries. The power of the fuel pins is one minus the total depression,
+  and the proxy is the maximum over the mean fuel pin power.
+
+  Parameters
+  ----------
+  grid : np.ndarray of bool
+    True at the BA pin positions
+  diffusion_length : float
+    Decay length of the flux depression in pitches
+  absorption_strength : float
+    Relative flux depression at a BA pin
+
+  Returns
+  -------
+  float
+    The peaking proxy, 1 for a flat power distribution
+  """
+  n = grid.shape[0]
+  ba = np.argwhere(grid)
+  if len(ba) == 0:
+    return 1.0
+
+  def mirrored(coordinates, side):
+    return {-1: -1 - coordinates, 0: coordinates, 1: 2 * n - 1 - coordinates}[side]
+
+  images = np.concatenate([np.column_stack((mirrored(ba[:, 0], si), mirrored(ba[:, 1], sj)))
+                           for si in (-1, 0, 1) for sj in (-1, 0, 1)])
+
+  rows, columns = np.indices((n, n))
+  distances = np.hypot(rows[..., None] - images[:, 0], columns[..., None] - images[:, 1])
+  depression = absorption_strength * np.exp(-distances / diffusion_length).sum(axis=-1)
+
+  power = np.clip(1 - depression, 0, None)[~grid]
+  if power.mean() == 0:
+    return math.inf
+  return float(power.max() / power.mean())
+
+def _satisfies(grid: np.ndarray, constraints: Iterable[Callable]):
+  return all(constraint(grid) for constraint in constraints)
+
+def _grid(orbits: list, selection: Iterable[int], lattice_size: int):
+  grid = np.zeros((lattice_size, lattice_size), dtype=bool)
+  for k in selection:
+    rows, columns = np.array(orbits[k]).T
+    grid[rows, columns] = True
+  return grid
+
+def _layout(grid: np.ndarray):
+  return AssemblyLayout(grid.astype(np.uint8))
+
+def _feasible_orbits(lattice_size: int, symmetry: str, constraints: Iterable[Callable]):
+  # Drop orbits that violate the constraints on their own, e.g. orbits on the edge
+  orbits = symmetry_orbits(lattice_size, symmetry)
+  return [orbit for k, orbit in enumerate(orbits) if _satisfies(_grid(orbits, [k], lattice_size), constraints)]
+
+def _subset_sums(sizes: Iterable[int]):
+  # Bit s is set if some subset of the sizes sums to s
+  sums = 1
+  for size in sizes:
+    sums |= sums << size
+  return sums
+
+def count_placements(lattice_size: int, n_ba_pins: int, symmetry: str = "d4"):
+  """Count the placements of n_ba_pins pins on whole orbits, an upper bound of what enumerate_placements yields"""
+  ways = [1] + [0] * n_ba_pins
+  for orbit in symmetry_orbits(lattice_size, symmetry):
+    for total in range(n_ba_pins, len(orbit) - 1, -1):
+      ways[total] += ways[total - len(orbit)]
+  return ways[n_ba_pins]
+
+def enumerate_placements(lattice_size: int, n_ba_pins: int, symmetry: str = "d4", constraints: Iterable[Callable] = ()):
+  """Enumerate all BA pin placements that are distinct under rotation and mirroring of the assembly
+
+  Parameters
+  ----------
+  lattice_size : int
+    Number of pins along a side of the lattice
+  n_ba_pins : int
+    Number of BA pins
+  symmetry : str
+    Symmetry the placements must have, see symmetry_orbits. With 'none' the number of placements grows
+    combinatorially, so only use it for small lattices or few pins.
+  constraints : iterable of callable
+    Functions of a boolean BA grid that return False if the placement is not allowed, e.g. not_adjacent()
+    or not_on_edge(). They are also used to prune partial placements, so adding a BA pin to a placement
+    that violates a constraint must never satisfy it.
+
+  Yields
+  ------
+  AssemblyLayout
+    The placements, with code 1 at the BA pin positions
+  """
+  orbits = _feasible_orbits(lattice_size, symmetry, constraints)
+  seen = set()
+
+  def backtrack(start, selection, remaining):
+    if remaining == 0:
+      layout = _layout(_grid(orbits, selection, lattice_size))
+      key = layout.canonical_grid().tobytes()
+      if key not in seen:
+        seen.add(key)
+        yield layout
+      return
+
+    for k in range(start, len(orbits)):
+      if len(orbits[k]) > remaining:
+        continue
+      if not _satisfies(_grid(orbits, selection + [k], lattice_size), constraints):
+        continue
+      yield from backtrack(k + 1, selection + [k], remaining - len(orbits[k]))
+
+  yield from backtrack(0, [], n_ba_pins)
+
+def _greedy(orbits, lattice_size, n_ba_pins, objective, constraints):
+  # Add the orbit that gives the best objective until all pins are placed, keeping the rest of the pins placeable
+  selection = []
+  remaining = n_ba_pins
+  while remaining > 0:
+    best = None
+    for k, orbit in enumerate(orbits):
+      if k in selection or len(orbit) > remaining:
+        continue
+      other_sizes = [len(other) for other_k, other in enumerate(orbits) if other_k not in selection and other_k != k]
+      if not (_subset_sums(other_sizes) >> (remaining - len(orbit))) & 1:
+        continue
+      grid = _grid(orbits, selection + [k], lattice_size)
+      if not _satisfies(grid, constraints):
+        continue
+      score = objective(grid)
+      if best is None or score < best[0]:
+        best = (score, k)
+
+    if best is None:
+      return None
+    selection.append(best[1])
+    remaining -= len(orbits[best[1]])
+  return selection
+
+def search(lattice_size: int, n_ba_pins: int, objective: Callable[[np.ndarray], float] = peaking_proxy,
+           symmetry: str = "d4", constraints: Iterable[Callable] = (), n_best: int = 5, method: str = "auto",
+           n_iterations: int = 5000, initial_temperature: float = 0.05, max_exhaustive: int = 10000, seed: int = None):
+  """Search for the BA pin placements with the best (lowest) cheap objective
+
+  Use this to rank the candidate layouts before sending only the best few to full OpenMC runs.
+
+  Parameters
+  ----------
+  lattice_size : int
+    Number of pins along a side of the lattice
+  n_ba_pins : int
+    Number of BA pins
+  objective : callable
+    Function of a boolean BA grid returning a score, lower is better. Defaults to peaking_proxy.
+  symmetry : str
+    Symmetry the placements must have, see symmetry_orbits
+  constraints : iterable of callable
+    See enumerate_placements
+  n_best : int
+    Number of placements to return
+  method : str
+    'exhaustive' evaluates every placement, 'greedy' builds one placement orbit by orbit, 'anneal' runs
+    simulated annealing starting from the greedy placement. 'auto' is exhaustive if count_placements is
+    at most max_exhaustive and anneal otherwise.
+  n_iterations : int
+    Number of annealing iterations
+  initial_temperature : float
+    Annealing temperature in units of the objective, decreased linearly to zero
+  max_exhaustive : int
+    See method
+  seed : int
+    Seed of the annealing random number generator
+
+  Returns
+  -------
+  list of tuple
+    Up to n_best (score, AssemblyLayout) pairs of distinct placements, best first
+  """
+  assert method in ("auto", "exhaustive", "greedy", "anneal"), "method must be 'auto', 'exhaustive', 'greedy' or 'anneal'"
+  if method == "auto":
+    method = "exhaustive" if count_placements(lattice_size, n_ba_pins, symmetry) <= max_exhaustive else "anneal"
+
+  ranking = {}
+  def rank(grid, score):
+    layout = _layout(grid)
+    ranking.setdefault(layout.canonical_grid().tobytes(), (score, layout))
+
+  if method == "exhaustive":
+    for layout in enumerate_placements(lattice_size, n_ba_pins, symmetry, constraints):
+      grid = layout.grid == 1
+      rank(grid, objective(grid))
+    return sorted(ranking.values(), key=lambda item: item[0])[:n_best]
+
+  orbits = _feasible_orbits(lattice_size, symmetry, constraints)
+  selection = _greedy(orbits, lattice_size, n_ba_pins, objective, constraints)
+  if selection is None:
+    return []
+  grid = _grid(orbits, selection, lattice_size)
+  score = objective(grid)
+  rank(grid, score)
+
+  if method == "anneal" and selection:
+    rng = np.random.default_rng(seed)
+    for iteration in range(n_iterations):
+      temperature = initial_temperature * (1 - iteration / n_iterations)
+
+      # Swap a selected orbit for an unselected one of the same size, which keeps the number of BA pins
+      removed = selection[rng.integers(len(selection))]
+      candidates = [k for k, orbit in enumerate(orbits) if k not in selection and len(orbit) == len(orbits[removed])]
+      if not candidates:
+        continue
+      proposal = [k for k in selection if k != removed] + [candidates[rng.integers(len(candidates))]]
+
+      proposal_grid = _grid(orbits, proposal, lattice_size)
+      if not _satisfies(proposal_grid, constraints):
+        continue
+      proposal_score = objective(proposal_grid)
+      rank(proposal_grid, proposal_score)
+
+      if proposal_score <= score or rng.random() < math.exp(-(proposal_score - score) / max(temperature, 1e-12)):
+        selection, score = proposal, proposal_score
+
+  return sorted(ranking.values(), key=lambda item: item[0])[:n_best]
@@ -1,11 +1,32 @@
+import math
+import numpy as np
 import openmc
 import openmc.model
+import openmc.stats
+from starbun.geometries.layouts import AssemblyLayout
+from starbun.geometries.ba_placement import symmetry_orbits
+
+# Fraction of the assembly that is modelled with each symmetry, see AssemblyLayout.symmetry
+DOMAIN_FRACTIONS = {"full": 1.0, "quarter": 0.25, "quarter-periodic": 0.25, "octant": 0.125}
+
+# Symmetry group of the positions of a layout with each symmetry, see symmetry_orbits
+ORBIT_SYMMETRIES = {"full": "none", "quarter": "d2", "quarter-periodic": "c4", "octant": "d4"}
 
 def rectangular_lattice(lattice_size: float, lattice_pitch: float, fuel_or: float,
-                        fuel_material: openmc.Material | list[openmc.Material], clad_ir: float, clad_or: float,
-                        clad_material: openmc.Material, moderator_material: openmc.Material, boundary_type: str):
+                        fuel_material: openmc.Material | list[openmc.Material | list[openmc.Material]] | AssemblyLayout, clad_ir: float, clad_or: float,
+                        clad_material: openmc.Material, moderator_material: openmc.Material, boundary_type: str,
+                        symmetry: str = "full"):
   """Create a rectangular lattice of fuel pins
 
+  One pin universe is created per distinct fuel material (compared by identity) and shared by all
+  lattice positions with that material, so the number of cells and surfaces does not grow with lattice_size.
+
+  With a reduced symmetry only the part x > 0, y > 0 (and y < x for 'octant') of the assembly is modelled,
+  with reflective (or for 'quarter-periodic' rotationally periodic) boundaries on the cut planes. Pins on a cut
+  plane are cut through their center, e.g. the center pin of an odd lattice is a quarter or eighth pin.
+  The layout must have the symmetry, see AssemblyLayout.symmetry, and extensive results have to be
+  scaled with DOMAIN_FRACTIONS or unfold_pin_map.
+
   Parameters
   ----------
   lattice_size : int
@@ -14,8 +35,9 @@ def rectangular_lattice(lattice_size: float, lattice_pitch: float, fuel_or: floa
     Distance between pin centers in cm
   fuel_or : float
     Outer radius of the fuel pin in cm
-  fuel_material : openmc.Material or list of openmc.Material of size lattice_size^2
-    The fuel material(s)
+  fuel_material : openmc.Material, list of openmc.Material of size lattice_size^2 or AssemblyLayout
+    The fuel material(s). None in place of a material gives a moderator-only position, and a list of
+    materials gives a pin with that many equal-area fuel rings, from the center out.
   clad_ir : float
     Inner radius of the cladding in cm
   clad_or : float 
@@ -24,6 +46,10 @@ def rectangular_lattice(lattice_size: float, lattice_pitch: float, fuel_or: floa
     The cladding material
   moderator_material : openmc.Material
     The moderator material
+  boundary_type : str
+    Boundary type of the outer boundary of the assembly
+  symmetry : str
+    'full', 'quarter', 'quarter-periodic' or 'octant', the part of the assembly to model
 
   Returns
   -------
@@ -31,7 +57,10 @@ def rectangular_lattice(lattice_size: float, lattice_pitch: float, fuel_or: floa
     The rectangular lattice of fuel pins
   """
 
-  if isinstance(fuel_material, openmc.Material):
+  if isinstance(fuel_material, AssemblyLayout):
+    assert fuel_material.lattice_size == lattice_size, "The layout must be of size lattice_size"
+    fuel_material = fuel_material.materials()
+  elif isinstance(fuel_material, openmc.Material):
     fuel_material = [fuel_material]*lattice_size**2
 
   assert len(fuel_material) == lattice_size**2, "The number of fuel materials must be equal to lattice_size^2, or a single material must be provided"
@@ -40,55 +69,282 @@ def rectangular_lattice(lattice_size: float, lattice_pitch: float, fuel_or: floa
   fuel_or_surf = openmc.ZCylinder(r=fuel_or)
   fuel_region = -fuel_or_surf
 
-  # Gap region
+  # Gap region, bounded by the fuel and cladding surfaces
+  clad_ir_surf = openmc.ZCylinder(r=clad_ir) if clad_ir > fuel_or else fuel_or_surf
   if clad_ir > fuel_or:
-    gap_ir_surf = openmc.ZCylinder(r=fuel_or)
-    gap_or_surf = openmc.ZCylinder(r=clad_ir)
-    gap_region = +gap_ir_surf & -gap_or_surf
+    gap_region = +fuel_or_surf & -clad_ir_surf
 
   # Cladding region
-  clad_ir_surf = openmc.ZCylinder(r=clad_ir)
   clad_or_surf = openmc.ZCylinder(r=clad_or)
   clad_region = +clad_ir_surf & -clad_or_surf
-  
 
   # Moderator region
   pin_cell_prism = openmc.model.RectangularPrism(width=lattice_pitch, height=lattice_pitch)
-  moderator_ir_surf = openmc.ZCylinder(r=clad_or)
-  moderator_region = +moderator_ir_surf & -pin_cell_prism
-  
+  moderator_region = +clad_or_surf & -pin_cell_prism
 
   # Prism for moderator only
   moderator_only_region = -pin_cell_prism
 
-  fuel_pin_universes = []
+  # Surfaces of equal-area fuel rings, per number of rings
+  ring_surfaces = {}
+
+  def get_fuel_cells(material: openmc.Material | list[openmc.Material]):
+    if not isinstance(material, (list, tuple)):
+      return [openmc.Cell(region=fuel_region, fill=material)]
+
+    n_rings = len(material)
+    if n_rings not in ring_surfaces:
+      ring_surfaces[n_rings] = [openmc.ZCylinder(r=fuel_or*math.sqrt(k/n_rings)) for k in range(1, n_rings)] + [fuel_or_surf]
+
+    fuel_cells = []
+    for k, ring_material in enumerate(material):
+      ring_region = -ring_surfaces[n_rings][k]
+      if k > 0:
+        ring_region &= +ring_surfaces[n_rings][k - 1]
+      fuel_cells.append(openmc.Cell(region=ring_region, fill=ring_material))
+    return fuel_cells
+
+  # Create one pin universe per distinct material and reuse it for all positions with that material
+  pin_universes = {}
+
+  def get_pin_universe(material: openmc.Material | list[openmc.Material]):
+    key = tuple(map(id, material)) if isinstance(material, (list, tuple)) else id(material)
+    if key in pin_universes:
+      return pin_universes[key]
 
-  for fuel_pin_idx, material in enumerate(fuel_material):
     if material is None:
       moderator_only_cell = openmc.Cell(region=moderator_only_region, fill=moderator_material)
-      fuel_pin_universe = openmc.Universe(cells=[moderator_only_cell])
-      fuel_pin_universes.append(fuel_pin_universe)
-      continue
+      pin_universe = openmc.Universe(cells=[moderator_only_cell])
     else:
-      fuel_cell = openmc.Cell(region=fuel_region, fill=material)
+      fuel_cells = get_fuel_cells(material)
       clad_cell = openmc.Cell(region=clad_region, fill=clad_material)
       moderator_cell = openmc.Cell(region=moderator_region, fill=moderator_material)
 
-    if clad_ir > fuel_or:
-      gap_cell = openmc.Cell(region=gap_region)
-      fuel_pin_universe = openmc.Universe(cells=[fuel_cell, gap_cell, clad_cell, moderator_cell])
-    else:
-      fuel_pin_universe = openmc.Universe(cells=[fuel_cell, clad_cell, moderator_cell])
+      if clad_ir > fuel_or:
+        gap_cell = openmc.Cell(region=gap_region)
+        pin_universe = openmc.Universe(cells=[*fuel_cells, gap_cell, clad_cell, moderator_cell])
+      else:
+        pin_universe = openmc.Universe(cells=[*fuel_cells, clad_cell, moderator_cell])
+
+    pin_universes[key] = pin_universe
+    return pin_universe
 
-    fuel_pin_universes.append(fuel_pin_universe)
+  fuel_pin_universes = [get_pin_universe(material) for material in fuel_material]
 
   lattice = openmc.RectLattice()
   lattice.lower_left = (-lattice_pitch*lattice_size/2, -lattice_pitch*lattice_size/2)
   lattice.pitch = (lattice_pitch, lattice_pitch)
   lattice.universes = [fuel_pin_universes[i*lattice_size:(i+1)*lattice_size] for i in range(lattice_size)]
 
-  lattice_prism = openmc.model.RectangularPrism(width=lattice_pitch*lattice_size, height=lattice_pitch*lattice_size, boundary_type=boundary_type)
-  lattice_cell = openmc.Cell(fill=lattice, region=-lattice_prism)
+  if symmetry == "full":
+    lattice_prism = openmc.model.RectangularPrism(width=lattice_pitch*lattice_size, height=lattice_pitch*lattice_size, boundary_type=boundary_type)
+    lattice_region = -lattice_prism
+  else:
+    half_width = lattice_pitch*lattice_size/2
+    cut_boundary_type = "periodic" if symmetry == "quarter-periodic" else "reflective"
+    x_min = openmc.XPlane(0.0, boundary_type=cut_boundary_type)
+    y_min = openmc.YPlane(0.0, boundary_type=cut_boundary_type)
+    x_max = openmc.XPlane(half_width, boundary_type=boundary_type)
+    y_max = openmc.YPlane(half_width, boundary_type=boundary_type)
+    lattice_region = +x_min & -x_max & +y_min & -y_max
+
+    if symmetry == "quarter-periodic":
+      # A particle leaving through y = 0 enters through x = 0 rotated by 90 degrees
+      x_min.periodic_surface = y_min
+    elif symmetry == "octant":
+      # x_min and y_max only touch the octant in its corners, but keep the region bounded
+      diagonal = openmc.Plane(a=1.0, b=-1.0, d=0.0, boundary_type="reflective")
+      lattice_region &= +diagonal
+    else:
+      assert symmetry == "quarter", f"Unknown symmetry '{symmetry}'"
+
+  lattice_cell = openmc.Cell(fill=lattice, region=lattice_region)
   lattice_universe = openmc.Universe(cells=[lattice_cell])
 
-  return lattice_universe
\ No newline at end of file
+  return lattice_universe
+
+def pin_fractions(lattice_size: int, symmetry: str = "full"):
+  """Get the fraction of every pin that is inside the modelled part of a lattice from rectangular_lattice
+
+  Parameters
+  ----------
+  lattice_size : int
+    Number of pins along a side of the lattice
+  symmetry : str
+    See rectangular_lattice
+
+  Returns
+  -------
+  np.ndarray
+    Array of shape (lattice_size, lattice_size), indexed like AssemblyLayout.grid, of 1 for whole pins,
+    1/2, 1/4 or 1/8 for pins cut by the symmetry planes and 0 for pins outside the model
+  """
+  if symmetry == "full":
+    return np.ones((lattice_size, lattice_size))
+
+  # Pin centers in units of the pitch, row 0 is the top of the lattice
+  centers = np.arange(lattice_size) - (lattice_size - 1)/2
+  x = centers[np.newaxis, :]
+  y = -centers[:, np.newaxis]
+
+  def inside(distance):
+    # Pins are cut through their center, so a pin on a plane is half inside
+    return np.where(distance > 0, 1.0, np.where(distance == 0, 0.5, 0.0))
+
+  fractions = inside(x) * inside(y)
+  if symmetry == "octant":
+    fractions = fractions * inside(x - y)
+  return fractions
+
+def unfold_pin_map(values, symmetry: str, extensive: bool = True):
+  """Map pin-wise results of a reduced model to the full assembly
+
+  Parameters
+  ----------
+  values : array_like
+    Array of shape (lattice_size, lattice_size), indexed like AssemblyLayout.grid, of a result of every pin
+    inside the model, e.g. a fission rate. Values of pins outside the model are ignored.
+  symmetry : str
+    The symmetry of the model, see rectangular_lattice
+  extensive : bool
+    If the result scales with the volume, so that pins cut by the symmetry planes are scaled to whole pins
+
+  Returns
+  -------
+  np.ndarray
+    The result of every pin of the full assembly
+  """
+  values = np.asarray(values, dtype=float)
+  fractions = pin_fractions(values.shape[0], symmetry)
+  inside = fractions > 0
+
+  whole_pin_values = np.where(inside, values, 0.0)
+  if extensive:
+    whole_pin_values[inside] /= fractions[inside]
+
+  # Images of the modelled part under the symmetry group cover the assembly
+  if symmetry == "octant":
+    transforms = [lambda grid, k=k: np.rot90(grid, k) for k in range(4)] + [lambda grid, k=k: np.fliplr(np.rot90(grid, k)) for k in range(4)]
+  elif symmetry == "quarter":
+    transforms = [lambda grid: grid, np.fliplr, np.flipud, lambda grid: np.rot90(grid, 2)]
+  elif symmetry == "quarter-periodic":
+    transforms = [lambda grid, k=k: np.rot90(grid, k) for k in range(4)]
+  else:
+    return whole_pin_values
+
+  full_values = np.full(values.shape, np.nan)
+  for transform in transforms:
+    full_values = np.where(np.isnan(full_values) & transform(inside), transform(whole_pin_values), full_values)
+  return full_values
+
+def depletion_zones(layout: AssemblyLayout, fuel_or: float, symmetry: str = "full", n_rings: dict[int, int] = None):
+  """Create one depletion material per group of equivalent pins of a layout
+
+  Pins that are mapped onto each other by the symmetry of the layout (see AssemblyLayout.symmetry) see the
+  same flux, so every symmetry orbit of positions shares one depletion material, a clone of its palette
+  material. Pins of the codes in n_rings are split into equal-area rings with one material each, e.g. to
+  resolve the self-shielding of Gd in BA pins. The volume of every material is its volume in the model.
+
+  Parameters
+  ----------
+  layout : AssemblyLayout
+    The layout, with the fuel material of each code as palette
+  fuel_or : float
+    Outer radius of the fuel pin in cm
+  symmetry : str
+    The part of the assembly that is modelled, see rectangular_lattice
+  n_rings : dict
+    Number of rings of each code, 1 for codes that are not given
+
+  Returns
+  -------
+  list
+    The material, or list of ring materials, of every position, to pass to rectangular_lattice
+  dict
+    The zone materials of each code
+  """
+  n_rings = n_rings or {}
+  fractions = pin_fractions(layout.lattice_size, symmetry)
+  ring_area = {code: np.pi*fuel_or**2/n_rings.get(code, 1) for code in range(len(layout.palette))}
+
+  fuel_materials = [None]*layout.lattice_size**2
+  zones = {code: [] for code in range(len(layout.palette))}
+  for orbit in symmetry_orbits(layout.lattice_size, ORBIT_SYMMETRIES[layout.symmetry()]):
+    code = int(layout.grid[orbit[0]])
+    material = layout.palette[code]
+    if material is None:
+      continue
+
+    # The area of the orbit inside the model, pins cut by the symmetry planes count partially
+    orbit_area = sum(fractions[position] for position in orbit) * ring_area[code]
+    assert orbit_area > 0, f"The layout does not have the symmetry '{symmetry}' of the model"
+
+    rings = []
+    for k in range(n_rings.get(code, 1)):
+      zone = material.clone()
+      zone.name = f"{material.name}_zone{len(zones[code])}"
+      zone.volume = orbit_area
+      zones[code].append(zone)
+      rings.append(zone)
+
+    for i, j in orbit:
+      fuel_materials[i*layout.lattice_size + j] = rings if len(rings) > 1 else rings[0]
+
+  return fuel_materials, zones
+
+def _domain_bounds(lattice_size: int, lattice_pitch: float, symmetry: str):
+  half_width = lattice_pitch*lattice_size/2
+  lower = -half_width if symmetry == "full" else 0.0
+  return lower, half_width
+
+def fissionable_source(lattice_size: int, lattice_pitch: float, symmetry: str = "full"):
+  """Create a source that is uniform over the fissionable regions of a lattice from rectangular_lattice
+
+  Parameters
+  ----------
+  lattice_size : int
+    Number of pins along a side of the lattice
+  lattice_pitch : float
+    Distance between pin centers in cm
+  symmetry : str
+    The symmetry of the lattice, see rectangular_lattice
+
+  Returns
+  -------
+  openmc.IndependentSource
+    The source, sampled in the z = 0 plane and rejected outside fissionable materials
+  """
+  # Sites outside the modelled part, e.g. above the diagonal of an octant, are rejected like non-fissionable ones
+  lower, upper = _domain_bounds(lattice_size, lattice_pitch, symmetry)
+  space = openmc.stats.Box((lower, lower, 0), (upper, upper, 0))
+  return openmc.IndependentSource(space=space, constraints={'fissionable': True})
+
+def entropy_mesh(lattice_size: int, lattice_pitch: float, symmetry: str = "full"):
+  """Create a Shannon entropy mesh with one bin per pin of a lattice from rectangular_lattice
+
+  Parameters
+  ----------
+  lattice_size : int
+    Number of pins along a side of the lattice
+  lattice_pitch : float
+    Distance between pin centers in cm
+  symmetry : str
+    The symmetry of the lattice, see rectangular_lattice. Only the pins in the modelled part get a bin.
+
+  Returns
+  -------
+  openmc.RegularMesh
+    The 2D mesh, to be set as openmc.Settings.entropy_mesh
+  """
+  lower, upper = _domain_bounds(lattice_size, lattice_pitch, symmetry)
+  n_bins = lattice_size
+  if symmetry != "full":
+    # Keep the bins aligned with the pins, the center pins of an odd lattice are cut in half
+    n_bins = math.ceil(lattice_size/2)
+    lower = upper - n_bins*lattice_pitch
+
+  mesh = openmc.RegularMesh()
+  mesh.lower_left = (lower, lower)
+  mesh.upper_right = (upper, upper)
+  mesh.dimension = (n_bins, n_bins)
+  return mesh
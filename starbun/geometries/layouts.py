@@ -0,0 +1,111 @@
+import numpy as np
+
+# Characters used for the codes in the string representation of a layout
+_CODE_CHARS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+class AssemblyLayout:
+  """Layout of the pins in a square fuel assembly
+
+  The layout is an integer-coded grid of pin types together with a palette mapping each code to
+  e.g. an openmc.Material. Row i and column j of the grid is lattice position (i, j), the same
+  ordering as the positions returned by ba_pin_positions.get and the universes of rectangular_lattice.
+
+  Two layouts compare and hash equal if their grids are equal up to a rotation or mirroring of the
+  assembly (the D4 symmetry group of the square), see canonical. The palette is not part of the identity.
+
+  Parameters
+  ----------
+  grid : array_like of int
+    Square grid of pin type codes
+  palette : list
+    Item c is the material (or any other object) of code c
+  """
+
+  def __init__(self, grid, palette: list = None):
+    self.grid = np.array(grid, dtype=np.uint8)
+    assert self.grid.ndim == 2 and self.grid.shape[0] == self.grid.shape[1], "The layout grid must be square"
+    self.grid.flags.writeable = False
+    self.palette = list(palette) if palette is not None else None
+    self._canonical_grid = None
+
+  @property
+  def lattice_size(self):
+    return self.grid.shape[0]
+
+  @classmethod
+  def from_positions(cls, positions: list[tuple[int, int]], lattice_size: int, palette: list = None, code: int = 1):
+    """Create a layout with code at the given positions and 0 elsewhere, e.g. from ba_pin_positions.get"""
+    grid = np.zeros((lattice_size, lattice_size), dtype=np.uint8)
+    if len(positions) > 0:
+      rows, columns = np.array(positions).T
+      grid[rows, columns] = code
+    return cls(grid, palette)
+
+  def to_positions(self, code: int = 1):
+    """Get the positions with the given code, in the format of ba_pin_positions.get"""
+    return [(int(i), int(j)) for i, j in np.argwhere(self.grid == code)]
+
+  @classmethod
+  def from_string(cls, string: str, palette: list = None):
+    """Create a layout from its string representation, see to_string"""
+    grid = [[_CODE_CHARS.index(char) for char in row] for row in string.split("/")]
+    return cls(grid, palette)
+
+  def to_string(self):
+    """Get a compact string representation of the grid, one character per pin and rows separated by '/'"""
+    assert self.grid.max(initial=0) < len(_CODE_CHARS), f"Codes above {len(_CODE_CHARS) - 1} can not be represented as a string"
+    return "/".join("".join(_CODE_CHARS[code] for code in row) for row in self.grid)
+
+  def materials(self):
+    """Get the palette item of every position as a flat list of length lattice_size^2, as accepted by rectangular_lattice"""
+    assert self.palette is not None, "The layout has no palette"
+    return [self.palette[code] for code in self.grid.flat]
+
+  def count(self, code: int = 1):
+    """Get the number of positions with the given code"""
+    return int(np.count_nonzero(self.grid == code))
+
+  def transforms(self):
+    """Get the 8 images of the grid under the D4 symmetry group (4 rotations, each optionally mirrored)"""
+    rotations = [np.rot90(self.grid, k) for k in range(4)]
+    return rotations + [np.fliplr(rotation) for rotation in rotations]
+
+  def symmetry(self):
+    """Get the largest symmetry of the grid that a reduced model can use, see rectangular_lattice
+
+    Returns
+    -------
+    str
+      'octant' if the grid is invariant under the whole D4 group, 'quarter' if it is mirror symmetric about
+      both axes, 'quarter-periodic' if it is only invariant under 90 degree rotations and 'full' otherwise
+    """
+    if all(np.array_equal(self.grid, image) for image in self.transforms()):
+      return "octant"
+    if np.array_equal(self.grid, np.fliplr(self.grid)) and np.array_equal(self.grid, np.flipud(self.grid)):
+      return "quarter"
+    if np.array_equal(self.grid, np.rot90(self.grid)):
+      return "quarter-periodic"
+    return "full"
+
+  def canonical_grid(self):
+    """Get the canonical grid, the lexicographically smallest of the D4 images of the grid"""
+    if self._canonical_grid is None:
+      canonical_grid = min(self.transforms(), key=lambda grid: grid.tobytes())
+      self._canonical_grid = np.ascontiguousarray(canonical_grid)
+      self._canonical_grid.flags.writeable = False
+    return self._canonical_grid
+
+  def canonical(self):
+    """Get the layout in its canonical orientation, with the same palette"""
+    return AssemblyLayout(self.canonical_grid(), self.palette)
+
+  def __eq__(self, other):
+    if not isinstance(other, AssemblyLayout):
+      return NotImplemented
+    return self.grid.shape == other.grid.shape and np.array_equal(self.canonical_grid(), other.canonical_grid())
+
+  def __hash__(self):
+    return hash((self.grid.shape, self.canonical_grid().tobytes()))
+
+  def __repr__(self):
+    return f"AssemblyLayout('{self.to_string()}')"
@@ -0,0 +1,52 @@
+import os
+from dataclasses import dataclass
+from starbun.utils.input_data import ExperimentInputData
+
+DEFAULT_DT = [3 * 24 * 60 * 60] * 5 + [200 * 24 * 60 * 60] * 10
+
+@dataclass
+class InputData(ExperimentInputData):
+  enrichment_pct: float = 5.0
+  lattice_pitch: float = 1.26
+  fuel_or: float = 0.45
+  clad_ir: float = 0.47
+  clad_or: float = 0.55
+  lattice_size: int = 10
+  dt: list[int] | None = None # Depletion time steps in s, defaults to DEFAULT_DT. Steps can be added to resume a finished run
+  adaptive_dt: bool = False # Choose the depletion time steps as the run goes, see starbun.utils.step_control. dt then records the chosen steps
+  end_time_d: float = 2015.0 # End of the depletion with adaptive_dt in days
+  dt_min_d: float = 1.0 # Shortest, and first, depletion time step with adaptive_dt in days
+  dt_max_d: float = 200.0 # Longest depletion time step with adaptive_dt in days
+  dt_tolerance_keff: float = 0.002 # Largest deviation of keff from a linear change over a depletion time step with adaptive_dt
+  dt_tolerance_ba: float = 0.1 # Largest change of Gd155 + Gd157 in the BA pins per depletion time step with adaptive_dt, relative to the initial amount
+  power: float = 4e6 / 400
+  n_ba_pins: int = 12
+  ba_pct: float = 5.0
+  symmetry: str = "auto" # Part of the assembly to model, see rectangular_lattice. 'auto' uses the largest symmetry of the layout
+  depletion_zoning: str = "symmetry" # 'symmetry': one depletion material per group of equivalent pins, 'pin': one per pin
+  n_ba_rings: int = 4 # Number of equal-area depletion rings of the BA pins with depletion_zoning 'symmetry'
+  particles: int = 1000
+  active_batches: int = 100
+  inactive_batches: int = 40
+  chain_file: str | None = None # Defaults to $OPENMC_DEPLETION_CHAIN
+  chain_level: int | None = None # Depth of the depletion chain reduced to the nuclides reachable from the fuel, see starbun.utils.chain_reduction. None uses the full chain_file
+  cross_sections: str | None = None # Defaults to $OPENMC_CROSS_SECTIONS
+
+  def __init__(self, experiment=None, *args, **kwargs):
+    self.experiment = experiment
+
+    # Check if kwargs is an empty dictionary
+    if kwargs:
+      for key, value in kwargs.items():
+        setattr(self, key, value)
+
+    if self.dt is None:
+      self.dt = list(DEFAULT_DT)
+
+    # Look up the nuclear data in the environment only when it is not given, e.g. not for loaded experiments
+    if self.chain_file is None:
+      self.chain_file = os.environ.get('OPENMC_DEPLETION_CHAIN')
+    if self.cross_sections is None:
+      self.cross_sections = os.environ.get('OPENMC_CROSS_SECTIONS')
+
+    super().__init__()
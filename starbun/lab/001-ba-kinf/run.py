@@ -1,10 +1,8 @@
 import os
+import time
 import numpy as np
-import matplotlib.pyplot as plt
+import yaml
 import argparse
-from dataclasses import dataclass, field
-from dataclass_wizard import DumpMeta, YAMLWizard
-from typing import ClassVar
 import openmc
 import openmc.stats
 import openmc.model
@@ -13,40 +11,23 @@ import starbun.materials.fuels
 import starbun.materials.claddings
 import starbun.materials.moderators
 import starbun.geometries.fuel_assemblies
+from starbun.geometries.layouts import AssemblyLayout
 import starbun.utils.tracker
+import starbun.utils.statepoint
+import starbun.utils.step_control
+import starbun.utils.chain_reduction
 
 import ba_pin_positions
-from starbun.utils.input_data import ExperimentInputData
-
-@dataclass
-class InputData(ExperimentInputData):
-  enrichment_pct: float = 5.0
-  lattice_pitch: float = 1.26
-  fuel_or: float = 0.45
-  clad_ir: float = 0.47
-  clad_or: float = 0.55
-  lattice_size: int = 10
-  dt: ClassVar[list[int]] = [3 * 24 * 60 * 60] * 5 + [200 * 24 * 60 * 60] * 10
-  power: float = 4e6 / 400
-  n_ba_pins: int = 12
-  ba_pct: float = 5.0
-  particles: int = 1000
-  active_batches: int = 100
-  inactive_batches: int = 40
-  chain_file: str = os.environ['OPENMC_DEPLETION_CHAIN']
-  cross_sections: str = os.environ['OPENMC_CROSS_SECTIONS']
-
-  def __init__(self, experiment=None, *args, **kwargs):
-    self.experiment = experiment
-
-    # Check if kwargs is an empty dictionary
-    if kwargs:
-      for key, value in kwargs.items():
-        setattr(self, key, value)
-
-    super().__init__()
+from input_data import InputData
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Nuclides whose burnout drives the adaptive time steps
+BA_NUCLIDES = ["Gd155", "Gd157"]
 
 def plot_geometry(inp: InputData, universe: openmc.Universe, colors: dict):  
+  import matplotlib.pyplot as plt
+
   # Increase font size for better visibility with large pixel counts
   original_font_size = plt.rcParams['font.size']
   plt.rcParams.update({'font.size': 50})
@@ -59,23 +40,42 @@ def plot_geometry(inp: InputData, universe: openmc.Universe, colors: dict):
   # Restore font size
   plt.rcParams.update({'font.size': original_font_size})
 
+def get_layout(inp: InputData):
+  return AssemblyLayout.from_positions(ba_pin_positions.get(inp.n_ba_pins, inp.lattice_size), inp.lattice_size)
+
+def get_symmetry(inp: InputData):
+  if inp.symmetry != "auto":
+    return inp.symmetry
+  # differentiate_depletable_mats divides the volume equally over the pins, which is wrong for pins cut by symmetry planes
+  if inp.depletion_zoning == "pin":
+    return "full"
+  return get_layout(inp).symmetry()
+
 def get_geometry(inp: InputData):
   uo2_no_ba = starbun.materials.fuels.uo2(enrichment_pct=inp.enrichment_pct)
   uo2_ba = starbun.materials.fuels.uo2(enrichment_pct=inp.enrichment_pct, gd2o3_pct=inp.ba_pct)
   zircaloy2 = starbun.materials.claddings.zircaloy2()
   water = starbun.materials.moderators.water()
 
-  # Set volumes of fuel as it is needed for depletion calculations
-  # TODO: Should this be multiplied by number of pins for each material?
-  uo2_no_ba.volume = np.pi * inp.fuel_or**2 * (inp.lattice_size**2 - inp.n_ba_pins)
-  uo2_ba.volume = np.pi * inp.fuel_or**2 * inp.n_ba_pins
+  layout = get_layout(inp)
+  layout.palette = [uo2_no_ba, uo2_ba]
+  symmetry = get_symmetry(inp)
 
-  ba_positions = ba_pin_positions.get(inp.n_ba_pins, inp.lattice_size)
-  fuel_materials = [uo2_ba if (i, j) in ba_positions else uo2_no_ba for i in range(inp.lattice_size) for j in range(inp.lattice_size)]
+  if inp.depletion_zoning == "symmetry":
+    # One depletion material per group of equivalent pins, with the BA pins split into rings
+    fuel_materials, zones = starbun.geometries.fuel_assemblies.depletion_zones(layout, inp.fuel_or, symmetry, n_rings={1: inp.n_ba_rings})
+    colors = {zone: 'seagreen' for zone in zones[0]} | {zone: 'firebrick' for zone in zones[1]}
+    print(f"Depletion zones: {len(zones[0])} fuel, {len(zones[1])} BA with {symmetry} symmetry")
+  else:
+    # The volume of a material is that of all its pins, differentiate_depletable_mats divides it equally over them
+    uo2_no_ba.volume = np.pi * inp.fuel_or**2 * layout.count(0)
+    uo2_ba.volume = np.pi * inp.fuel_or**2 * layout.count(1)
+    fuel_materials = layout
+    colors = {uo2_no_ba: 'seagreen', uo2_ba: 'firebrick'}
 
-  universe = starbun.geometries.fuel_assemblies.rectangular_lattice(inp.lattice_size, inp.lattice_pitch, inp.fuel_or, fuel_materials, inp.clad_ir, inp.clad_or, zircaloy2, water, boundary_type='reflective')
+  universe = starbun.geometries.fuel_assemblies.rectangular_lattice(inp.lattice_size, inp.lattice_pitch, inp.fuel_or, fuel_materials, inp.clad_ir, inp.clad_or, zircaloy2, water, boundary_type='reflective', symmetry=symmetry)
 
-  colors = {uo2_no_ba: 'seagreen', uo2_ba: 'firebrick', zircaloy2: 'gray', water: 'cornflowerblue'}
+  colors |= {zircaloy2: 'gray', water: 'cornflowerblue'}
   plot_geometry(inp, universe, colors)
 
   geometry = openmc.Geometry(universe)
@@ -86,28 +86,134 @@ def get_settings(inp: InputData):
   settings.particles = inp.particles
   settings.batches = inp.active_batches + inp.inactive_batches
   settings.inactive = inp.inactive_batches
-  # settings.source = openmc.IndependentSource(space=openmc.stats.Box((-lattice_pitch*lattice_size/2, -lattice_pitch*lattice_size/2, 0), (lattice_pitch*lattice_size/2, lattice_pitch*lattice_size/2, 0)))
-  settings.source = openmc.IndependentSource(space=openmc.stats.Point((0, 0, 0)))
+  # Start uniformly over the fuel and track the source convergence with one entropy bin per pin
+  settings.source = starbun.geometries.fuel_assemblies.fissionable_source(inp.lattice_size, inp.lattice_pitch, get_symmetry(inp))
+  settings.entropy_mesh = starbun.geometries.fuel_assemblies.entropy_mesh(inp.lattice_size, inp.lattice_pitch, get_symmetry(inp))
   return settings
 
+def get_depletion_results(inp: InputData):
+  """Get the depletion results of an experiment, or None if no step has been completed"""
+  results_path = os.path.join(inp.cwd_path, "depletion_results.h5")
+  if not os.path.isfile(results_path):
+    return None
+  return openmc.deplete.Results(results_path)
+
+def write_step_records(inp: InputData, results: openmc.deplete.Results, wall_times: dict[int, float]):
+  """Write steps.yaml in the experiment directory, with a record of every completed depletion step"""
+  records_path = os.path.join(inp.experiment_path, "steps.yaml")
+  records = {}
+  if os.path.isfile(records_path):
+    with open(records_path, "r") as file:
+      records = {record["step"]: record for record in yaml.safe_load(file) or []}
+
+  # The results have one entry per completed step and one for the end of the last step
+  time_d, k = results.get_keff(time_units="d")
+  for step in range(len(results) - 1):
+    record = records.get(step, {})
+    record.update({
+      "step": step,
+      "dt": int(inp.dt[step]),
+      "start_time_d": float(time_d[step]),
+      "end_time_d": float(time_d[step + 1]),
+      "keff_end": float(k[step + 1, 0]),
+      "keff_end_std": float(k[step + 1, 1]),
+    })
+    if step in wall_times:
+      record["wall_time"] = wall_times[step]
+      record["completed_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    records[step] = record
+
+  tmp_records_path = f"{records_path}.{os.getpid()}"
+  with open(tmp_records_path, "w") as file:
+    yaml.safe_dump([records[step] for step in sorted(records)], file, sort_keys=False)
+  os.replace(tmp_records_path, records_path)
+
+def get_adaptive_dt(inp: InputData, model: openmc.model.Model, results: openmc.deplete.Results):
+  """Get the next depletion time step in s from the results so far, or None if the run is done"""
+  if results is None:
+    time_s, keff, absorber = np.zeros(1), np.ones((1, 2)), np.zeros(1)
+  else:
+    time_s, keff = results.get_keff()
+    ba_materials = [str(material.id) for material in model.geometry.get_all_materials().values() if material.name.startswith("uo2_gd2o3")]
+    absorber = np.zeros(len(time_s))
+    for material in ba_materials:
+      for nuclide in BA_NUCLIDES:
+        absorber += results.get_atoms(material, nuclide)[1]
+
+  return starbun.utils.step_control.next_time_step(
+    time_s, keff[:, 0], keff[:, 1], absorber, inp.dt_min_d * SECONDS_PER_DAY, inp.dt_max_d * SECONDS_PER_DAY, inp.end_time_d * SECONDS_PER_DAY,
+    tolerance_keff=inp.dt_tolerance_keff, tolerance_absorber=inp.dt_tolerance_ba)
+
+def get_chain_file(inp: InputData, model: openmc.model.Model):
+  """Get the depletion chain of an experiment, reduced to the nuclides reachable from its depletable materials if chain_level is given"""
+  if inp.chain_level is None:
+    return inp.chain_file
+
+  nuclides = {nuclide for material in model.geometry.get_all_materials().values() if material.depletable for nuclide in material.get_nuclides()}
+  chain_file, n_nuclides = starbun.utils.chain_reduction.reduced_chain(inp.chain_file, sorted(nuclides), inp.chain_level)
+  print(f"Experiment {inp.experiment}: depletion chain reduced to {n_nuclides} nuclides at level {inp.chain_level}")
+  return chain_file
+
 def run_depletion(inp: InputData, model: openmc.model.Model):
-  op = openmc.deplete.CoupledOperator(model, diff_burnable_mats=False, chain_file=inp.chain_file)
-  cecm = openmc.deplete.CECMIntegrator(op, inp.dt, inp.power)
-  os.chdir(inp.cwd_path)
-  cecm.integrate()
-  os.chdir(inp.original_cwd_path)
+  """Deplete one step at a time, continuing after the last step in depletion_results.h5 if there is one
+
+  Every step restarts the operator from the previous results, which gives the same transport solves as one
+  integration over all steps, while a crash only loses the step that was running.
+  """
+  # Only the modelled part of the assembly produces power
+  power = inp.power * starbun.geometries.fuel_assemblies.DOMAIN_FRACTIONS[get_symmetry(inp)]
+  chain_file = get_chain_file(inp, model)
+
+  results = get_depletion_results(inp)
+  completed_steps = len(results) - 1 if results is not None else 0
+  if completed_steps > 0:
+    print(f"Experiment {inp.experiment}: resuming after {completed_steps} of {len(inp.dt)} depletion steps")
+
+  if inp.adaptive_dt:
+    # The steps are chosen as the run goes, so forget the planned ones
+    inp.dt = list(inp.dt[:completed_steps])
+
+  step = completed_steps
+  while True:
+    if inp.adaptive_dt:
+      dt = get_adaptive_dt(inp, model, results)
+      if dt is None:
+        break
+      inp.dt.append(int(round(dt)))
+      inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+      print(f"Experiment {inp.experiment}: depletion step {step} of {dt / SECONDS_PER_DAY:.1f} d")
+    elif step >= len(inp.dt):
+      break
+
+    start_time = time.perf_counter()
+    op = openmc.deplete.CoupledOperator(model, diff_burnable_mats=False, chain_file=chain_file, prev_results=results)
+    cecm = openmc.deplete.CECMIntegrator(op, [inp.dt[step]], power)
+    os.chdir(inp.cwd_path)
+    try:
+      cecm.integrate()
+    finally:
+      os.chdir(inp.original_cwd_path)
+
+    results = get_depletion_results(inp)
+    write_step_records(inp, results, {step: time.perf_counter() - start_time})
+    step += 1
 
 def get_results(inp: InputData, output_path: str = None):
   if output_path is None:
     output_path = inp.results_path
   
+  import matplotlib.pyplot as plt
+
   results = openmc.deplete.Results(f'{inp.cwd_path}/depletion_results.h5')
 
   # Get the runtime by adding all the time steps from the statepoints
-  runtimes = [openmc.StatePoint(filepath=f'{inp.cwd_path}/openmc_simulation_n{i}.h5', autolink=False).runtime["total"] for i in range(1, len(inp.dt) + 1)]
-  runtime = sum(runtimes)
-  label = f"Chain: {inp.chain_file.split('/')[-1]}\nRuntime: {runtime:.0f} s"
-  print(f"Depletion chain: {inp.chain_file.split('/')[-1]}, runtime: {runtime:.0f} s")
+  statepoint_paths = [f'{inp.cwd_path}/openmc_simulation_n{i}.h5' for i in range(1, len(inp.dt) + 1)]
+  runtime = sum(values["runtime"] for values in starbun.utils.statepoint.read_many(statepoint_paths, ["runtime"]))
+  chain_name = inp.chain_file.split('/')[-1]
+  if inp.chain_level is not None:
+    chain_name += f" (level {inp.chain_level})"
+  label = f"Chain: {chain_name}\nRuntime: {runtime:.0f} s"
+  print(f"Depletion chain: {chain_name}, runtime: {runtime:.0f} s")
 
   # Plot the depletion
   time, k = results.get_keff(time_units="d")
@@ -120,13 +226,49 @@ def get_results(inp: InputData, output_path: str = None):
   plt.tight_layout()
   plt.savefig(f'{output_path}/keff.png')
 
+def compare_results(inps: list[InputData]):
+  """Print the keff(t) differences of experiments from the first one, e.g. to see the effect of a reduced chain"""
+  reference = inps[0]
+  reference_time, reference_k = openmc.deplete.Results(f'{reference.cwd_path}/depletion_results.h5').get_keff(time_units="d")
+  for inp in inps[1:]:
+    time, k = openmc.deplete.Results(f'{inp.cwd_path}/depletion_results.h5').get_keff(time_units="d")
+    comparison = starbun.utils.chain_reduction.compare_keff(reference_time, reference_k, time, k)
+    if comparison["n_times"] == 0:
+      print(f"Experiment {inp.experiment} has no times in common with experiment {reference.experiment}")
+      continue
+    print(f"Experiment {inp.experiment} vs {reference.experiment}: max |dk| = {comparison['max_diff_pcm']:.0f} pcm "
+          f"({comparison['max_diff_sigma']:.1f} sigma), mean dk = {comparison['mean_diff_pcm']:.0f} pcm over {comparison['n_times']} times")
+
 def main():
   argparser = argparse.ArgumentParser() # Add argument to specity experiment numbers to get results on, e.g. 1, 2, 7, 928. Given as a space-separated list of numbers
   argparser.add_argument("-e", "--experiment_numbers", help="Experiment numbers to get results on, e.g. 1, 2, 7, 928", type=int, nargs='+')
+  argparser.add_argument("--chain-level", help="Deplete a new experiment with the chain reduced to this depth from the fuel nuclides, see starbun.utils.chain_reduction", type=int)
+  argparser.add_argument("--adaptive-dt", help="Choose the depletion time steps of a new experiment from the change in keff and Gd, see starbun.utils.step_control", action="store_true")
+  argparser.add_argument("-r", "--resume", help="Experiment number to continue depleting from its last completed step", type=int)
+  argparser.add_argument("--extend", help="Number of depletion steps to add to the schedule of the resumed experiment", type=int, default=0)
+  argparser.add_argument("--extend-days", help="Length in days of the added depletion steps", type=float, default=200)
   args = argparser.parse_args()
   experiment_numbers : list[str] = args.experiment_numbers
 
-  if experiment_numbers is not None:
+  if args.resume is not None:
+    inp = InputData(experiment=starbun.utils.tracker.format_tracker_value(args.resume))
+    inp = InputData.from_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+    if args.extend > 0:
+      if inp.adaptive_dt:
+        inp.end_time_d += args.extend * args.extend_days
+      else:
+        inp.dt = list(inp.dt) + [int(args.extend_days * SECONDS_PER_DAY)] * args.extend
+      inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
+
+    # The material ids must match those in the results, so the model is built the same way as in the first run
+    model = openmc.model.Model(geometry=get_geometry(inp), settings=get_settings(inp))
+    if inp.depletion_zoning == "pin":
+      model.differentiate_depletable_mats(diff_volume_method="divide equally")
+    run_depletion(inp, model)
+
+    get_results(inp)
+    return
+  elif experiment_numbers is not None:
     print(f"Getting results for experiments: {experiment_numbers}")
     if len(experiment_numbers) == 1:
       output_path = None # If only one experiment number is given, the results will be saved in the experiment's results folder
@@ -134,13 +276,19 @@ def main():
       output_path = os.path.join("combined", "_".join([str(experiment_number) for experiment_number in experiment_numbers]))
       os.makedirs(output_path, exist_ok=True)
 
+    loaded_inps = []
     for experiment_number in experiment_numbers:
       inp = InputData(experiment=starbun.utils.tracker.format_tracker_value(experiment_number))
       loaded_inp = InputData.from_yaml_file(f'{inp.experiment_path}/input_data.yaml')
       get_results(loaded_inp, output_path)
+      loaded_inps.append(loaded_inp)
+
+    # The first experiment is the reference, e.g. the full chain
+    if len(loaded_inps) > 1:
+      compare_results(loaded_inps)
     return # Exit the program after getting results
   else:
-    inp = InputData()
+    inp = InputData(adaptive_dt=args.adaptive_dt, chain_level=args.chain_level)
 
     # Save the input data as a yaml file
     inp.to_yaml_file(f'{inp.experiment_path}/input_data.yaml')
@@ -151,7 +299,8 @@ def main():
     settings = get_settings(inp)
 
     model = openmc.model.Model(geometry=geometry, settings=settings)
-    model.differentiate_depletable_mats(diff_volume_method="divide equally")
+    if inp.depletion_zoning == "pin":
+      model.differentiate_depletable_mats(diff_volume_method="divide equally")
     run_depletion(inp, model)
     
     get_results(inp)
@@ -0,0 +1,4 @@
+import starbun.data_for_nn.surrogate
+
+if __name__ == "__main__":
+  starbun.data_for_nn.surrogate.main()
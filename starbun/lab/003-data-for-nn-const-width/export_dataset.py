@@ -0,0 +1,4 @@
+import starbun.data_for_nn.export_dataset
+
+if __name__ == "__main__":
+  starbun.data_for_nn.export_dataset.main()
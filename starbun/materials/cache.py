@@ -0,0 +1,79 @@
+import functools
+import inspect
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# All memoized factories, so that their caches can be inspected and cleared together
+_factories = []
+
+def memoized_material(maxsize: int = 128):
+  """Memoize a material factory on its arguments
+
+  The first call with a set of arguments builds the material and keeps it as a private prototype.
+  Every call, including the first, returns a clone of the prototype with a fresh ID, so callers
+  can modify the returned material (e.g. set its volume) without affecting later calls.
+  Arguments are normalized with the factory signature, so uo2() and uo2(enrichment_pct=5.0) share an entry.
+
+  Parameters
+  ----------
+  maxsize : int
+    Maximum number of prototypes to keep, least recently used are dropped first. Unbounded if None.
+
+  Returns
+  -------
+  callable
+    Decorator for a function returning an openmc.Material. The decorated function gets
+    cache_info() and cache_clear() methods like functools.lru_cache.
+  """
+  def decorator(factory):
+    signature = inspect.signature(factory)
+    prototypes = OrderedDict()
+    stats = {"hits": 0, "misses": 0}
+
+    @functools.wraps(factory)
+    def wrapper(*args, **kwargs):
+      bound = signature.bind(*args, **kwargs)
+      bound.apply_defaults()
+      key = tuple(bound.arguments.items())
+
+      if key in prototypes:
+        stats["hits"] += 1
+        prototypes.move_to_end(key)
+      else:
+        stats["misses"] += 1
+        prototypes[key] = factory(*args, **kwargs)
+        if maxsize is not None and len(prototypes) > maxsize:
+          prototypes.popitem(last=False)
+
+      return prototypes[key].clone()
+
+    def cache_info():
+      return CacheInfo(stats["hits"], stats["misses"], maxsize, len(prototypes))
+
+    def cache_clear():
+      prototypes.clear()
+      stats["hits"] = 0
+      stats["misses"] = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    _factories.append(wrapper)
+    return wrapper
+
+  return decorator
+
+def cache_info():
+  """Get the cache statistics of all memoized material factories
+
+  Returns
+  -------
+  dict
+    CacheInfo by qualified factory name, e.g. 'starbun.materials.fuels.uo2'
+  """
+  return {f"{factory.__module__}.{factory.__name__}": factory.cache_info() for factory in _factories}
+
+def cache_clear():
+  """Clear the caches of all memoized material factories"""
+  for factory in _factories:
+    factory.cache_clear()
@@ -1,5 +1,7 @@
 import openmc
+from starbun.materials.cache import memoized_material
 
+@memoized_material()
 def zircaloy4(density=6.55, temperature=900.0):
   """Create a Zircaloy-4 cladding material
 
@@ -23,6 +25,7 @@ def zircaloy4(density=6.55, temperature=900.0):
 
   return cladding
 
+@memoized_material()
 def zircaloy2(density=6.55, temperature=900.0):
   """Create a Zircaloy-2 cladding material
 
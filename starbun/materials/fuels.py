@@ -1,5 +1,7 @@
 import openmc
+from starbun.materials.cache import memoized_material
 
+@memoized_material()
 def uo2(density=10.0, temperature=900.0, enrichment_pct=5.0, gd2o3_pct=0.0):
   """Create a UO2 fuel material
 
@@ -35,6 +37,7 @@ def uo2(density=10.0, temperature=900.0, enrichment_pct=5.0, gd2o3_pct=0.0):
 
   return fuel
 
+@memoized_material()
 def gd2o3(density=7.4, temperature=900.0):
   """Create a Gd2O3 burnable absorber material
 
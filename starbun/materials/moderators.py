@@ -1,7 +1,9 @@
 import openmc
 import openmc.data
 import openmc.model
+from starbun.materials.cache import memoized_material
 
+@memoized_material()
 def water(boron_ppm=0.0, temperature=300.0, pressure=0.1013):
   """Create a water moderator material
   
@@ -0,0 +1,179 @@
+import itertools
+from typing import Callable
+
+import numpy as np
+
+from starbun.surrogate.keff import KeffSurrogate
+
+def latin_hypercube(n_points: int, n_dims: int, rng: np.random.Generator):
+  """Sample n_points in [0, 1)^n_dims with one point in each of n_points equal slices of every dimension"""
+  slices = np.stack([rng.permutation(n_points) for _ in range(n_dims)], axis=1)
+  return (slices + rng.random((n_points, n_dims))) / n_points
+
+def design_points(unit_points: np.ndarray, space: dict):
+  """Map points of the unit hypercube to points of a parameter space
+
+  Parameters
+  ----------
+  unit_points : np.ndarray
+    Array of shape (n, len(space)), e.g. from latin_hypercube
+  space : dict
+    For every parameter either a list of its discrete values or a (low, high) tuple of a continuous range
+
+  Returns
+  -------
+  list of dict
+    The points, as the value of every parameter
+  """
+  points = [{} for _ in unit_points]
+  for column, (name, values) in enumerate(space.items()):
+    u = unit_points[:, column]
+    if isinstance(values, tuple):
+      low, high = values
+      mapped = low + u * (high - low)
+    else:
+      mapped = [values[i] for i in np.minimum((u * len(values)).astype(int), len(values) - 1)]
+    for point, value in zip(points, mapped):
+      point[name] = value
+  return points
+
+def candidate_grid(space: dict, n_continuous: int = 33):
+  """Get the Cartesian grid of the parameter space, with n_continuous values in every continuous range
+
+  Returns
+  -------
+  tuple
+    The grid points as a list of dicts, in C order of the grid, and the shape of the grid
+  """
+  axes = {name: list(np.linspace(*values, n_continuous)) if isinstance(values, tuple) else list(values)
+          for name, values in space.items()}
+  points = [dict(zip(axes, values)) for values in itertools.product(*axes.values())]
+  return points, tuple(len(values) for values in axes.values())
+
+def curvature(mean: np.ndarray, shape: tuple, continuous_axes: list[int]):
+  """Get the largest absolute second difference of a function on a grid along its continuous axes, 0 at the ends"""
+  mean = mean.reshape(shape)
+  result = np.zeros(shape)
+  for axis in continuous_axes:
+    if shape[axis] < 3:
+      continue
+    second_difference = np.abs(np.diff(mean, n=2, axis=axis))
+    inner = [slice(None)] * len(shape)
+    inner[axis] = slice(1, -1)
+    result[tuple(inner)] = np.maximum(result[tuple(inner)], second_difference)
+  return result.ravel()
+
+def select_batch(score: np.ndarray, points: list[dict], batch_size: int, space: dict, min_distance: float = 0.1,
+                 exclude: list[dict] = ()):
+  """Greedily pick the points with the highest score, skipping points too close to an already picked one
+
+  Points are close if they have the same discrete parameters and their continuous parameters differ by less than
+  min_distance of their range. Points in exclude, e.g. the ones that have already been run, are skipped.
+  """
+  continuous = [name for name, values in space.items() if isinstance(values, tuple)]
+  discrete = [name for name in space if name not in continuous]
+
+  def close(a, b):
+    return all(a[name] == b[name] for name in discrete) and all(
+      abs(a[name] - b[name]) < min_distance * (space[name][1] - space[name][0]) for name in continuous)
+
+  batch = []
+  for index in np.argsort(-score):
+    if len(batch) == batch_size:
+      break
+    if points[index] in exclude:
+      continue
+    if not any(close(points[index], picked) for picked in batch):
+      batch.append(points[index])
+  return batch
+
+def run_active_learning(space: dict, evaluate: Callable[[list[dict]], tuple], model_inputs: Callable[[list[dict]], tuple],
+                        surrogate: KeffSurrogate = None, n_initial: int = 15, batch_size: int = 8, target_std: float = 5e-4,
+                        max_points: int = 200, curvature_weight: float = 1.0, n_continuous: int = 33, seed: int = 0):
+  """Choose and run the points of a sweep until a surrogate of keff reaches a target accuracy over the whole space
+
+  The sweep starts from a Latin hypercube design, or, if the surrogate has already been trained, e.g. on the
+  experiments that are already stored, from a batch chosen like the later ones. After every batch the surrogate
+  is updated, and the next batch
+  is the candidates of a dense grid with the highest score, the predicted standard deviation plus curvature_weight
+  times the second difference of the predicted keff between neighbouring grid points. The sweep stops once the
+  predicted standard deviation is below target_std everywhere on the grid and the last batch was predicted
+  within target_std (RMS) before it was run, or after max_points points.
+
+  Parameters
+  ----------
+  space : dict
+    The parameters, see design_points
+  evaluate : callable
+    Function running a list of points and returning their keff and its standard deviation as arrays
+  model_inputs : callable
+    Function getting the layouts and scalars of a list of points, see KeffSurrogate.update
+  surrogate : KeffSurrogate
+    Surrogate to update, possibly already trained, a new one by default
+  n_initial : int
+    Number of points of the initial design
+  batch_size : int
+    Number of points per batch
+  target_std : float
+    Target accuracy of keff, must be larger than the noise_std of the surrogate
+  max_points : int
+    Maximum number of points to run
+  curvature_weight : float
+    Weight of the curvature in the score
+  n_continuous : int
+    Number of grid values of every continuous parameter
+  seed : int
+    Seed of the initial design
+
+  Returns
+  -------
+  tuple
+    The surrogate and a list of dicts with the progress after every batch
+  """
+  surrogate = surrogate if surrogate is not None else KeffSurrogate()
+  rng = np.random.default_rng(seed)
+  candidates, shape = candidate_grid(space, n_continuous)
+  candidate_layouts, candidate_scalars = model_inputs(candidates)
+  continuous_axes = [axis for axis, values in enumerate(space.values()) if isinstance(values, tuple)]
+
+  n_run = 0
+  run_points = []
+  history = []
+
+  def next_batch(mean, std):
+    score = std + curvature_weight * curvature(mean, shape, continuous_axes)
+    return select_batch(score, candidates, min(batch_size, max_points - n_run), space, exclude=run_points)
+
+  if surrogate.n_observations == 0:
+    points = design_points(latin_hypercube(n_initial, len(space), rng), space)
+  else:
+    points = next_batch(*surrogate.predict(candidate_layouts, candidate_scalars))
+  while points:
+    layouts, scalars = model_inputs(points)
+    batch_rms = None
+    if surrogate.n_observations > 0:
+      predicted_keff, _ = surrogate.predict(layouts, scalars)
+
+    keff, keff_std = evaluate(points)
+    keff = np.asarray(keff, dtype=float)
+    if surrogate.n_observations > 0:
+      batch_rms = float(np.sqrt(np.mean((predicted_keff - keff)**2)))
+    surrogate.update(layouts, scalars, keff, keff_std)
+    n_run += len(points)
+    run_points += points
+
+    mean, std = surrogate.predict(candidate_layouts, candidate_scalars)
+    history.append({"n_points": n_run, "max_std": float(std.max()), "mean_std": float(std.mean()), "batch_rms": batch_rms})
+    print(f"Active learning after {n_run} points: predicted keff std max {std.max() * 1e5:.0f} pcm, mean {std.mean() * 1e5:.0f} pcm"
+          + (f", RMS error of the last batch before it was run {batch_rms * 1e5:.0f} pcm" if batch_rms is not None else ""))
+
+    if std.max() < target_std and batch_rms is not None and batch_rms < target_std:
+      print(f"Reached the target accuracy of {target_std * 1e5:.0f} pcm")
+      break
+    if n_run >= max_points:
+      print(f"Stopped at the maximum of {max_points} points before reaching the target accuracy")
+      break
+
+    points = next_batch(mean, std)
+
+  return surrogate, history
@@ -0,0 +1,95 @@
+import numpy as np
+
+from starbun.geometries.layouts import AssemblyLayout
+
+# Inputs of an experiment that are used as features, next to the layout
+SCALAR_NAMES = ["ba_pct", "enrichment_pct", "lattice_size", "lattice_pitch", "fuel_or", "clad_ir", "clad_or"]
+
+# Number of square rings around the center that the BA pins are counted in
+N_RINGS = 4
+
+LAYOUT_FEATURE_NAMES = [f"ba_ring_{k}" for k in range(N_RINGS)] + ["ba_fraction", "ba_radius", "ba_adjacency"]
+FEATURE_NAMES = LAYOUT_FEATURE_NAMES + SCALAR_NAMES + ["moderator_ratio", "ba_pct_log"]
+
+def _as_grid(layout):
+  if isinstance(layout, AssemblyLayout):
+    return layout.grid
+  if isinstance(layout, str):
+    return AssemblyLayout.from_string(layout).grid
+  return np.asarray(layout)
+
+def layout_features(layouts: list, code: int = 1):
+  """Get features of BA layouts that do not change under rotation or mirroring of the assembly
+
+  The features are the fraction of the positions that are BA pins in each of N_RINGS square rings around the
+  center, in total, their mean distance from the center relative to the half width, and the number of pairs of
+  side-by-side BA pins per position. Layouts of the same size are handled together.
+
+  Parameters
+  ----------
+  layouts : list
+    AssemblyLayout objects, their strings or grids, possibly of different sizes
+  code : int
+    Code of the BA pins in the grids
+
+  Returns
+  -------
+  np.ndarray
+    Array of shape (len(layouts), len(LAYOUT_FEATURE_NAMES))
+  """
+  grids = [_as_grid(layout) for layout in layouts]
+  features = np.zeros((len(grids), len(LAYOUT_FEATURE_NAMES)))
+
+  for size in {grid.shape[0] for grid in grids}:
+    indices = [i for i, grid in enumerate(grids) if grid.shape[0] == size]
+    ba = np.stack([grids[i] for i in indices]) == code
+    n_positions = size**2
+
+    # Distances from the center relative to the half width, in [0, 1)
+    center = (size - 1) / 2
+    rows, columns = np.indices((size, size))
+    chebyshev = np.maximum(np.abs(rows - center), np.abs(columns - center)) / (size / 2)
+    radius = np.hypot(rows - center, columns - center) / (size / 2)
+    ring = np.minimum((chebyshev * N_RINGS).astype(int), N_RINGS - 1)
+
+    ring_counts = np.stack([ba[:, ring == k].sum(axis=1) for k in range(N_RINGS)], axis=1)
+    n_ba = ba.sum(axis=(1, 2))
+    mean_radius = np.divide((ba * radius).sum(axis=(1, 2)), n_ba, out=np.zeros(len(indices)), where=n_ba > 0)
+    adjacency = (ba[:, 1:, :] & ba[:, :-1, :]).sum(axis=(1, 2)) + (ba[:, :, 1:] & ba[:, :, :-1]).sum(axis=(1, 2))
+
+    features[indices] = np.column_stack([ring_counts / n_positions, n_ba / n_positions, mean_radius, adjacency / n_positions])
+
+  return features
+
+def scalar_features(scalars: dict):
+  """Get the scalar features from the inputs, including the moderator-to-fuel area ratio of a pin cell
+
+  log(1 + ba_pct) is added since the BA worth saturates as the BA self-shields, which a polynomial of ba_pct
+  alone fits poorly.
+
+  Parameters
+  ----------
+  scalars : dict or pandas.DataFrame
+    Array of the values of each of SCALAR_NAMES
+
+  Returns
+  -------
+  np.ndarray
+    Array of shape (n, len(SCALAR_NAMES) + 2)
+  """
+  values = np.column_stack([np.asarray(scalars[name], dtype=float) for name in SCALAR_NAMES])
+  pitch, fuel_or, clad_or = (np.asarray(scalars[name], dtype=float) for name in ["lattice_pitch", "fuel_or", "clad_or"])
+  moderator_ratio = (pitch**2 - np.pi * clad_or**2) / (np.pi * fuel_or**2)
+  return np.column_stack([values, moderator_ratio, np.log1p(np.asarray(scalars["ba_pct"], dtype=float))])
+
+def features(layouts: list, scalars: dict):
+  """Get the features of FEATURE_NAMES of a batch of assemblies, see layout_features and scalar_features"""
+  return np.column_stack([layout_features(layouts), scalar_features(scalars)])
+
+def polynomial_basis(x: np.ndarray, degree: int = 2):
+  """Expand features into a constant, the features and, for degree 2, all their pairwise products and squares"""
+  columns = [np.ones((len(x), 1)), x]
+  if degree >= 2:
+    i, j = np.triu_indices(x.shape[1])
+    columns.append(x[:, i] * x[:, j])
+  return np.column_stack(columns)
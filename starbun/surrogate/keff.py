@@ -0,0 +1,125 @@
+from typing import Callable
+
+import numpy as np
+
+from starbun.surrogate.features import FEATURE_NAMES, features, polynomial_basis
+from starbun.surrogate.regression import BayesianLinearRegression
+
+class KeffSurrogate:
+  """Fast keff predictor trained on the results of experiments
+
+  keff is modelled as a polynomial of the features of starbun.surrogate.features, with Bayesian linear
+  regression, so that a prediction comes with its uncertainty and new experiments are added with update
+  without refitting the old ones. The features are standardized with the mean and standard deviation of the
+  first batch of training data, which are kept fixed afterwards.
+
+  Parameters
+  ----------
+  degree : int
+    Degree of the polynomial, 1 or 2
+  prior_precision : float
+    Precision of the prior of the weights of the standardized features
+  noise_std : float
+    Standard deviation of the model error in keff, added to the statistical uncertainty of each experiment
+  """
+
+  def __init__(self, degree: int = 2, prior_precision: float = 1.0, noise_std: float = 1e-3):
+    self.degree = degree
+    self.prior_precision = prior_precision
+    self.noise_std = noise_std
+    self.feature_mean = None
+    self.feature_std = None
+    self.keff_offset = None
+    self.regression = None
+    self.experiments = set()
+
+  @property
+  def n_observations(self):
+    return self.regression.n_observations if self.regression is not None else 0
+
+  def _basis(self, layouts: list, scalars: dict):
+    return polynomial_basis((features(layouts, scalars) - self.feature_mean) / self.feature_std, self.degree)
+
+  def update(self, layouts: list, scalars: dict, keff: np.ndarray, keff_std: np.ndarray = None):
+    """Train on a batch of experiments
+
+    Parameters
+    ----------
+    layouts : list
+      Layouts of the experiments, see starbun.surrogate.features.layout_features
+    scalars : dict or pandas.DataFrame
+      Inputs of the experiments, see starbun.surrogate.features.SCALAR_NAMES
+    keff, keff_std : np.ndarray
+      keff of the experiments and its standard deviation
+    """
+    if len(layouts) == 0:
+      return
+    keff = np.asarray(keff, dtype=float)
+
+    if self.regression is None:
+      x = features(layouts, scalars)
+      self.feature_mean = x.mean(axis=0)
+      self.feature_std = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+      self.keff_offset = float(keff.mean())
+
+    basis = self._basis(layouts, scalars)
+    if self.regression is None:
+      self.regression = BayesianLinearRegression(basis.shape[1], self.prior_precision, self.noise_std)
+    self.regression.update(basis, keff - self.keff_offset, keff_std)
+
+  def predict(self, layouts: list, scalars: dict):
+    """Predict keff of a batch of assemblies
+
+    Returns
+    -------
+    tuple of np.ndarray
+      The predicted keff and its standard deviation
+    """
+    assert self.regression is not None, "The surrogate has not been trained"
+    mean, std = self.regression.predict(self._basis(layouts, scalars))
+    return mean + self.keff_offset, std
+
+  def update_from_index(self, index, get_layout: Callable = None):
+    """Train on the experiments of a results index that have not been trained on yet
+
+    Parameters
+    ----------
+    index : starbun.utils.results_index.ResultsIndex
+      The index, updated by the caller
+    get_layout : callable
+      Function getting the layout from a row of index.to_dataframe(), see ResultsIndex.training_rows
+
+    Returns
+    -------
+    int
+      Number of experiments trained on
+    """
+    data, layouts = index.training_rows(self.experiments, get_layout)
+    if data.empty:
+      return 0
+    self.update(layouts, data, data["keff"].to_numpy(), data["keff_std"].to_numpy())
+    self.experiments.update(data["experiment"])
+    return len(data)
+
+  def save(self, path: str):
+    """Save the surrogate to an .npz file"""
+    assert self.regression is not None, "The surrogate has not been trained"
+    regression_state = {f"regression_{key}": value for key, value in self.regression.state().items()}
+    np.savez(path, degree=self.degree, feature_names=np.array(FEATURE_NAMES), feature_mean=self.feature_mean,
+             feature_std=self.feature_std, keff_offset=self.keff_offset, experiments=np.array(sorted(self.experiments), dtype=str),
+             **regression_state)
+
+  @classmethod
+  def load(cls, path: str):
+    """Load a surrogate saved with save"""
+    with np.load(path) as file:
+      assert list(file["feature_names"]) == FEATURE_NAMES, "The surrogate was saved with other features"
+      regression = BayesianLinearRegression.from_state({key[len("regression_"):]: file[key] for key in file.files
+                                                        if key.startswith("regression_")})
+      surrogate = cls(int(file["degree"]), regression.prior_precision, regression.noise_std)
+      surrogate.feature_mean = file["feature_mean"]
+      surrogate.feature_std = file["feature_std"]
+      surrogate.keff_offset = float(file["keff_offset"])
+      surrogate.experiments = set(file["experiments"].tolist())
+    surrogate.regression = regression
+    return surrogate
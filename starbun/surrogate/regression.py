@@ -0,0 +1,78 @@
+import numpy as np
+
+class BayesianLinearRegression:
+  """Bayesian linear regression with a Gaussian prior, updated incrementally
+
+  Only the sufficient statistics X^T W X and X^T W y are kept, so new observations are added without
+  refitting the old ones, and the cost of an update does not grow with the amount of data. Each observation
+  is weighted by the inverse of its variance, the sum of its own (e.g. the statistical uncertainty of
+  keff) and the variance noise_std^2 of what the basis can not represent. If the weighted residuals show
+  that noise_std is too small, the predictive standard deviation is scaled up by the square root of the
+  reduced chi-square.
+
+  Parameters
+  ----------
+  n_features : int
+    Number of basis functions
+  prior_precision : float
+    Precision of the zero-mean Gaussian prior of the weights
+  noise_std : float
+    Standard deviation of the model error
+  """
+
+  def __init__(self, n_features: int, prior_precision: float = 1.0, noise_std: float = 1e-3):
+    self.prior_precision = prior_precision
+    self.noise_std = noise_std
+    self.precision = prior_precision * np.eye(n_features)
+    self.projection = np.zeros(n_features)
+    self.square_sum = 0.0
+    self.n_observations = 0
+    self._solve()
+
+  def _solve(self):
+    cholesky = np.linalg.cholesky(self.precision)
+    inverse_cholesky = np.linalg.solve(cholesky, np.eye(len(cholesky)))
+    self.covariance = inverse_cholesky.T @ inverse_cholesky
+    self.mean = self.covariance @ self.projection
+
+    # Weighted sum of the squared residuals, from y^T W y - 2 m^T X^T W y + m^T X^T W X m
+    data_precision = self.precision - self.prior_precision * np.eye(len(self.precision))
+    chi_square = self.square_sum - 2 * self.mean @ self.projection + self.mean @ data_precision @ self.mean
+    # Degrees of freedom left after the number of weights that are determined by the data rather than the prior
+    n_free = self.n_observations - (len(self.precision) - self.prior_precision * np.trace(self.covariance))
+    self.scale = max(1.0, np.sqrt(max(chi_square, 0.0) / n_free)) if n_free >= 1 else 1.0
+
+  def update(self, x: np.ndarray, y: np.ndarray, y_std: np.ndarray = None):
+    """Add observations y of the basis functions x, with standard deviations y_std"""
+    x = np.atleast_2d(x)
+    y = np.asarray(y, dtype=float)
+    variance = self.noise_std**2 + (np.asarray(y_std, dtype=float)**2 if y_std is not None else 0.0)
+    weights = np.broadcast_to(1 / variance, y.shape)
+
+    self.precision += (x * weights[:, None]).T @ x
+    self.projection += x.T @ (weights * y)
+    self.square_sum += float(np.sum(weights * y**2))
+    self.n_observations += len(y)
+    self._solve()
+
+  def predict(self, x: np.ndarray):
+    """Get the predictive mean and standard deviation at the basis functions x"""
+    x = np.atleast_2d(x)
+    mean = x @ self.mean
+    variance = self.noise_std**2 + np.einsum("ij,ij->i", x @ self.covariance, x)
+    return mean, self.scale * np.sqrt(variance)
+
+  def state(self):
+    """Get the state as a dict of arrays, e.g. for np.savez"""
+    return {"prior_precision": self.prior_precision, "noise_std": self.noise_std, "precision": self.precision,
+            "projection": self.projection, "square_sum": self.square_sum, "n_observations": self.n_observations}
+
+  @classmethod
+  def from_state(cls, state: dict):
+    regression = cls(len(state["projection"]), float(state["prior_precision"]), float(state["noise_std"]))
+    regression.precision = np.array(state["precision"])
+    regression.projection = np.array(state["projection"])
+    regression.square_sum = float(state["square_sum"])
+    regression.n_observations = int(state["n_observations"])
+    regression._solve()
+    return regression
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+def chain_identity(chain_file: str):
+  """Get a hash of the contents of a depletion chain file"""
+  with open(chain_file, "rb") as file:
+    return hashlib.sha256(file.read()).hexdigest()
+
+def reduced_chain(chain_file: str, nuclides: list[str], level: int = None, cache_path: str = "chains"):
+  """Get a depletion chain with only the nuclides that can be reached from the given ones, cached on disk
+
+  The chain is reduced with openmc.deplete.Chain.reduce, which follows decay, reactions and fission yields from
+  the initial nuclides up to level steps deep. Reducing a full chain takes a while, so the reduced chain is
+  stored as <cache_path>/<key>.xml, keyed by the contents of the full chain, the nuclides and the level.
+
+  Parameters
+  ----------
+  chain_file : str
+    Path of the full depletion chain
+  nuclides : list of str
+    Initial nuclides, e.g. those of the depletable materials of a model
+  level : int
+    Depth of the search from the initial nuclides, unlimited if None
+  cache_path : str
+    Directory of the reduced chains
+
+  Returns
+  -------
+  str
+    Path of the reduced chain file
+  int
+    Number of nuclides in the reduced chain
+  """
+  key_data = json.dumps({"chain": chain_identity(chain_file), "nuclides": sorted(set(nuclides)), "level": level})
+  key = hashlib.sha256(key_data.encode()).hexdigest()[:16]
+  reduced_chain_file = os.path.join(cache_path, f"{key}.xml")
+  info_file = os.path.join(cache_path, f"{key}.json")
+
+  if os.path.isfile(reduced_chain_file) and os.path.isfile(info_file):
+    with open(info_file, "r") as file:
+      return reduced_chain_file, json.load(file)["n_nuclides"]
+
+  import openmc.deplete
+
+  chain = openmc.deplete.Chain.from_xml(chain_file).reduce(sorted(set(nuclides)), level)
+  os.makedirs(cache_path, exist_ok=True)
+
+  # Write under temporary names first, so that concurrent runs never read a partial chain
+  tmp_chain_file = os.path.join(cache_path, f".{key}.xml.{os.getpid()}")
+  chain.export_to_xml(tmp_chain_file)
+  os.replace(tmp_chain_file, reduced_chain_file)
+
+  tmp_info_file = os.path.join(cache_path, f".{key}.json.{os.getpid()}")
+  with open(tmp_info_file, "w") as file:
+    json.dump({"chain_file": os.path.realpath(chain_file), "nuclides": sorted(set(nuclides)), "level": level,
+               "n_nuclides": len(chain.nuclides)}, file, indent=2)
+  os.replace(tmp_info_file, info_file)
+
+  return reduced_chain_file, len(chain.nuclides)
+
+def compare_keff(reference_time: np.ndarray, reference_keff: np.ndarray, time: np.ndarray, keff: np.ndarray):
+  """Compare the keff(t) of a depletion run with a reference run, e.g. a reduced chain with the full chain
+
+  Parameters
+  ----------
+  reference_time, time : np.ndarray
+    Times of the results of the reference and compared run
+  reference_keff, keff : np.ndarray
+    keff and its standard deviation at each time, of shape (n_times, 2) as returned by Results.get_keff
+
+  Returns
+  -------
+  dict
+    'n_times' compared, the largest absolute difference 'max_diff_pcm', the 'mean_diff_pcm' and the largest
+    difference in combined standard deviations 'max_diff_sigma', over the times both runs have
+  """
+  common_time, reference_index, index = np.intersect1d(np.round(reference_time, 3), np.round(time, 3), return_indices=True)
+  diff = keff[index, 0] - reference_keff[reference_index, 0]
+  sigma = np.hypot(keff[index, 1], reference_keff[reference_index, 1])
+  with np.errstate(divide="ignore", invalid="ignore"):
+    diff_sigma = np.where(sigma > 0, np.abs(diff) / sigma, np.inf)
+
+  if len(common_time) == 0:
+    return {"n_times": 0, "max_diff_pcm": None, "mean_diff_pcm": None, "max_diff_sigma": None}
+  return {
+    "n_times": len(common_time),
+    "max_diff_pcm": float(np.max(np.abs(diff)) * 1e5),
+    "mean_diff_pcm": float(np.mean(diff) * 1e5),
+    "max_diff_sigma": float(np.max(diff_sigma)),
+  }
@@ -0,0 +1,89 @@
+import math
+
+import numpy as np
+
+import starbun.utils.statepoint
+
+def entropy_converged_batch(entropy: np.ndarray, tail_fraction: float = 0.5, window: int = 5, n_sigma: float = 2.0):
+  """Estimate the batch at which the fission source has converged from the Shannon entropy of each batch
+
+  The last tail_fraction of the batches is taken as stationary, giving a reference mean and standard
+  deviation of the entropy. The source is converged from the first batch after which the moving average
+  of the entropy over window batches stays within n_sigma reference standard deviations of the mean.
+
+  Parameters
+  ----------
+  entropy : np.ndarray
+    Shannon entropy of every batch, e.g. from starbun.utils.statepoint.read(path, ['entropy'])
+  tail_fraction : float
+    Fraction of the batches at the end that are assumed to be converged
+  window : int
+    Number of batches of the moving average
+  n_sigma : float
+    Width of the band around the reference mean, in reference standard deviations
+
+  Returns
+  -------
+  int
+    The converged batch, counting from 1. Equal to len(entropy) + 1 if the entropy never settles.
+  """
+  entropy = np.asarray(entropy, dtype=float)
+  n_batches = len(entropy)
+  tail = entropy[int(n_batches * (1 - tail_fraction)):]
+  if n_batches < window or len(tail) < 2:
+    return n_batches + 1
+
+  mean, std = tail.mean(), tail.std(ddof=1)
+  moving_average = np.convolve(entropy, np.ones(window) / window, mode="valid")
+
+  # moving_average[i] is the average over batches i+1 to i+window
+  outside = np.flatnonzero(np.abs(moving_average - mean) > n_sigma * std)
+  if len(outside) == 0:
+    return 1
+  return int(outside[-1]) + window + 1
+
+def suggest_inactive_batches(converged_batches: list[int], margin: float = 1.25, minimum: int = 5):
+  """Suggest a number of inactive batches from the converged batches of earlier, similar runs
+
+  Parameters
+  ----------
+  converged_batches : list of int
+    Converged batches, see entropy_converged_batch
+  margin : float
+    Factor applied to the latest converged batch
+  minimum : int
+    Smallest number of inactive batches to suggest
+
+  Returns
+  -------
+  int
+    The suggested number of inactive batches
+  """
+  return max(math.ceil(margin * max(converged_batches)), minimum)
+
+def check_convergence(statepoint_path: str, **kwargs):
+  """Check if the fission source of a run converged before the active batches started
+
+  Parameters
+  ----------
+  statepoint_path : str
+    Path of a statepoint of a run with an entropy mesh
+  **kwargs
+    Passed to entropy_converged_batch
+
+  Returns
+  -------
+  dict
+    'entropy_converged_batch', 'n_inactive' and 'source_converged', which is False if batches were tallied
+    before the source converged. All are None if the run has no entropy.
+  """
+  values = starbun.utils.statepoint.read(statepoint_path, ["entropy", "n_inactive"])
+  if values["entropy"] is None or len(values["entropy"]) == 0:
+    return {"entropy_converged_batch": None, "n_inactive": values["n_inactive"], "source_converged": None}
+
+  converged_batch = entropy_converged_batch(values["entropy"], **kwargs)
+  return {
+    "entropy_converged_batch": converged_batch,
+    "n_inactive": values["n_inactive"],
+    "source_converged": converged_batch <= values["n_inactive"] + 1,
+  }
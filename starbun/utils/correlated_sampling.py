@@ -0,0 +1,51 @@
+import numpy as np
+
+import starbun.utils.statepoint
+
+def paired_difference(k_generation_a: np.ndarray, k_generation_b: np.ndarray, n_inactive: int):
+  """Estimate the keff difference of two runs and its uncertainty, with and without accounting for their correlation
+
+  Runs with the same seed, source and batch structure use common random numbers, so their batch keffs are
+  correlated and the batch differences vary less than the batches themselves. The variance of the mean
+  difference is estimated from the batch differences, and compared with the sum of the variances of the
+  two runs, which is what independent runs would give. Correlation between the batches of a run is ignored
+  in both estimates.
+
+  Parameters
+  ----------
+  k_generation_a, k_generation_b : np.ndarray
+    keff of every batch of the two runs, see starbun.utils.statepoint.read
+  n_inactive : int
+    Number of inactive batches, which are left out
+
+  Returns
+  -------
+  dict
+    'delta_k' (b - a), its standard deviation 'delta_k_std', the standard deviation independent runs would
+    give 'delta_k_std_independent', the 'correlation' of the batch keffs and the 'variance_reduction', the
+    factor by which the particles per run could be cut for the same uncertainty of delta_k as independent runs.
+    If the batch keffs of the runs are identical, e.g. runs of the same physics with the same seed, there is no
+    difference variance and 'variance_reduction' is None.
+  """
+  n_batches = min(len(k_generation_a), len(k_generation_b))
+  k_a = np.asarray(k_generation_a[n_inactive:n_batches], dtype=float)
+  k_b = np.asarray(k_generation_b[n_inactive:n_batches], dtype=float)
+  n = len(k_a)
+
+  delta_variance = np.var(k_b - k_a, ddof=1) / n
+  independent_variance = (np.var(k_a, ddof=1) + np.var(k_b, ddof=1)) / n
+  return {
+    "n_batches": n,
+    "delta_k": float(np.mean(k_b - k_a)),
+    "delta_k_std": float(np.sqrt(delta_variance)),
+    "delta_k_std_independent": float(np.sqrt(independent_variance)),
+    "correlation": float(np.corrcoef(k_a, k_b)[0, 1]),
+    "variance_reduction": float(independent_variance / delta_variance) if delta_variance > 0 else None,
+  }
+
+def compare_statepoints(statepoint_a: str, statepoint_b: str):
+  """Get the paired_difference of the batch keffs of two statepoints with the same batch structure"""
+  values_a = starbun.utils.statepoint.read(statepoint_a, ["k_generation", "n_inactive"])
+  values_b = starbun.utils.statepoint.read(statepoint_b, ["k_generation", "n_inactive"])
+  assert values_a["n_inactive"] == values_b["n_inactive"], "The runs must have the same number of inactive batches"
+  return paired_difference(values_a["k_generation"], values_b["k_generation"], values_a["n_inactive"])
@@ -0,0 +1,257 @@
+import json
+import os
+from typing import Callable
+
+import numpy as np
+
+import starbun.utils.tracker
+from starbun.geometries.layouts import AssemblyLayout
+from starbun.surrogate.features import SCALAR_NAMES
+
+SCHEMA_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# Code of the grid positions outside the lattice of a layout smaller than the grid
+PAD_CODE = 255
+
+def _field_dtypes(grid_size: int, n_scalars: int):
+  return {
+    "layouts": (np.uint8, (grid_size, grid_size)),
+    "scalars": (np.float64, (n_scalars,)),
+    "keff": (np.float64, (2,)), # keff and its standard deviation
+    "experiments": ("<U16", ()),
+  }
+
+def _shard_path(path: str, shard: int, field: str):
+  return os.path.join(path, f"shard-{shard:05d}.{field}.npy")
+
+def _save_atomic(file_path: str, array: np.ndarray):
+  # Write to a temporary file and rename it, so that readers never see a half-written shard
+  tmp_path = f"{file_path}.{os.getpid()}.tmp"
+  with open(tmp_path, "wb") as file:
+    np.save(file, array)
+  os.replace(tmp_path, file_path)
+
+def pad_layouts(layouts: list, grid_size: int):
+  """Stack layouts of different sizes into one uint8 array, padded with PAD_CODE at the bottom and right
+
+  Parameters
+  ----------
+  layouts : list
+    AssemblyLayout objects, their strings or grids
+  grid_size : int
+    Size of the padded grids, at least the largest lattice size
+
+  Returns
+  -------
+  np.ndarray
+    Array of shape (len(layouts), grid_size, grid_size)
+  """
+  grids = np.full((len(layouts), grid_size, grid_size), PAD_CODE, dtype=np.uint8)
+  for i, layout in enumerate(layouts):
+    if isinstance(layout, str):
+      layout = AssemblyLayout.from_string(layout)
+    grid = layout.grid if isinstance(layout, AssemblyLayout) else np.asarray(layout)
+    assert grid.shape[0] <= grid_size, f"A {grid.shape[0]}x{grid.shape[0]} layout does not fit in a {grid_size}x{grid_size} grid"
+    grids[i, :grid.shape[0], :grid.shape[1]] = grid
+  return grids
+
+def _merge_statistics(statistics: dict, values: np.ndarray):
+  # Combine the running count, mean and sum of squared deviations with those of a batch (Chan et al.)
+  n = len(values)
+  if n == 0:
+    return statistics
+  mean = float(np.mean(values))
+  m2 = float(np.sum((values - mean)**2))
+  if statistics is None or statistics["count"] == 0:
+    count, merged_mean, merged_m2 = n, mean, m2
+    minimum, maximum = float(np.min(values)), float(np.max(values))
+  else:
+    count = statistics["count"] + n
+    delta = mean - statistics["mean"]
+    merged_mean = statistics["mean"] + delta * n / count
+    merged_m2 = statistics["m2"] + m2 + delta**2 * statistics["count"] * n / count
+    minimum, maximum = min(statistics["min"], float(np.min(values))), max(statistics["max"], float(np.max(values)))
+  return {"count": count, "mean": merged_mean, "std": float(np.sqrt(merged_m2 / count)), "m2": merged_m2,
+          "min": minimum, "max": maximum}
+
+class DatasetWriter:
+  """Writer of a sharded training dataset of layouts, scalar inputs and keff labels
+
+  Every shard holds up to shard_size experiments as one .npy file per field: 'layouts' (uint8 grids padded
+  with PAD_CODE), 'scalars' (the inputs of scalar_names), 'keff' (keff and its standard deviation) and
+  'experiments' (the experiment numbers). Full shards are never changed again, new experiments fill the last
+  shard and then start new ones. manifest.json holds the schema, the number of rows of every shard and the
+  statistics of every field, and is written last, so readers only see complete appends. Appends by
+  concurrent processes are serialized with a file lock.
+
+  Parameters
+  ----------
+  path : str
+    Directory of the dataset, created if it does not exist
+  shard_size : int
+    Number of experiments per shard
+  grid_size : int
+    Size of the padded layout grids
+  scalar_names : list of str
+    Inputs stored as scalars, by default the ones the keff surrogate uses
+  """
+
+  def __init__(self, path: str = "dataset", shard_size: int = 4096, grid_size: int = 17, scalar_names: list[str] = SCALAR_NAMES):
+    self.path = path
+    self.manifest_path = os.path.join(path, MANIFEST_FILE)
+    os.makedirs(path, exist_ok=True)
+
+    manifest = self._read_manifest()
+    if manifest is not None:
+      # An existing dataset keeps its schema
+      shard_size, grid_size, scalar_names = manifest["shard_size"], manifest["grid_size"], manifest["scalar_names"]
+    self.shard_size = shard_size
+    self.grid_size = grid_size
+    self.scalar_names = list(scalar_names)
+    self.dtypes = _field_dtypes(grid_size, len(self.scalar_names))
+
+  def _read_manifest(self):
+    if not os.path.isfile(self.manifest_path):
+      return None
+    with open(self.manifest_path, "r") as file:
+      manifest = json.load(file)
+    assert manifest["schema_version"] == SCHEMA_VERSION, \
+      f"The dataset in {self.path} has schema version {manifest['schema_version']}, expected {SCHEMA_VERSION}"
+    return manifest
+
+  def _new_manifest(self):
+    return {
+      "schema_version": SCHEMA_VERSION,
+      "shard_size": self.shard_size,
+      "grid_size": self.grid_size,
+      "pad_code": PAD_CODE,
+      "scalar_names": self.scalar_names,
+      "fields": {field: {"dtype": np.dtype(dtype).str, "shape": list(shape)} for field, (dtype, shape) in self.dtypes.items()},
+      "shards": [],
+      "n_rows": 0,
+      "statistics": {},
+    }
+
+  def experiments(self):
+    """Get the set of experiments in the dataset"""
+    manifest = self._read_manifest()
+    if manifest is None:
+      return set()
+    return {str(experiment) for shard in manifest["shards"]
+            for experiment in np.load(_shard_path(self.path, shard["index"], "experiments"), mmap_mode="r")[:shard["n_rows"]]}
+
+  def append(self, layouts: list, scalars: dict, keff: np.ndarray, keff_std: np.ndarray, experiments: list[str]):
+    """Append experiments that are not in the dataset yet
+
+    Parameters
+    ----------
+    layouts : list
+      Layouts of the experiments, see pad_layouts
+    scalars : dict or pandas.DataFrame
+      Values of every input of scalar_names
+    keff, keff_std : np.ndarray
+      keff of the experiments and its standard deviation
+    experiments : list of str
+      Experiment numbers, experiments that are already in the dataset are skipped
+
+    Returns
+    -------
+    int
+      Number of appended experiments
+    """
+    with starbun.utils.tracker.locked(self.manifest_path):
+      manifest = self._read_manifest() or self._new_manifest()
+      known = self.experiments()
+      new = np.array([str(experiment) not in known for experiment in experiments], dtype=bool)
+      if not new.any():
+        return 0
+
+      rows = {
+        "layouts": pad_layouts([layout for layout, is_new in zip(layouts, new) if is_new], self.grid_size),
+        "scalars": np.column_stack([np.asarray(scalars[name], dtype=float) for name in self.scalar_names])[new],
+        "keff": np.column_stack([np.asarray(keff, dtype=float), np.asarray(keff_std, dtype=float)])[new],
+        "experiments": np.array([str(experiment) for experiment in experiments], dtype=self.dtypes["experiments"][0])[new],
+      }
+      n_new = int(new.sum())
+
+      # Fill up the last shard, then start new ones
+      start = 0
+      shards = manifest["shards"]
+      while start < n_new:
+        if shards and shards[-1]["n_rows"] < self.shard_size:
+          shard = shards[-1]
+          existing = {field: np.load(_shard_path(self.path, shard["index"], field))[:shard["n_rows"]] for field in rows}
+        else:
+          shard = {"index": len(shards), "n_rows": 0}
+          shards.append(shard)
+          existing = {field: np.empty((0, *shape), dtype=dtype) for field, (dtype, shape) in self.dtypes.items()}
+
+        stop = min(n_new, start + self.shard_size - shard["n_rows"])
+        for field in rows:
+          _save_atomic(_shard_path(self.path, shard["index"], field), np.concatenate([existing[field], rows[field][start:stop]]))
+        shard["n_rows"] += stop - start
+        start = stop
+
+      manifest["n_rows"] += n_new
+      statistics = manifest["statistics"]
+      for column, name in enumerate(self.scalar_names):
+        statistics[name] = _merge_statistics(statistics.get(name), rows["scalars"][:, column])
+      statistics["keff"] = _merge_statistics(statistics.get("keff"), rows["keff"][:, 0])
+      statistics["keff_std"] = _merge_statistics(statistics.get("keff_std"), rows["keff"][:, 1])
+      statistics["n_ba_pins"] = _merge_statistics(statistics.get("n_ba_pins"), np.count_nonzero(rows["layouts"] == 1, axis=(1, 2)))
+
+      tmp_manifest_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+      with open(tmp_manifest_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+      os.replace(tmp_manifest_path, self.manifest_path)
+
+    return n_new
+
+def export_index(index, writer: DatasetWriter, get_layout: Callable = None):
+  """Append the continuous-energy experiments of a results index that are not in a dataset yet
+
+  Parameters
+  ----------
+  index : starbun.utils.results_index.ResultsIndex
+    The index, updated by the caller
+  writer : DatasetWriter
+    Writer of the dataset
+  get_layout : callable
+    Function getting the layout from a row of index.to_dataframe(), see ResultsIndex.training_rows
+
+  Returns
+  -------
+  int
+    Number of appended experiments
+  """
+  data, layouts = index.training_rows(writer.experiments(), get_layout)
+  if data.empty:
+    return 0
+
+  return writer.append(layouts, data, data["keff"].to_numpy(), data["keff_std"].to_numpy(), data["experiment"].tolist())
+
+def open_dataset(path: str = "dataset", mmap_mode: str = "r"):
+  """Open a dataset written by DatasetWriter without reading the shards into memory
+
+  Parameters
+  ----------
+  path : str
+    Directory of the dataset
+  mmap_mode : str
+    Memory-map mode of the shards, see np.load. None reads them into memory.
+
+  Returns
+  -------
+  tuple
+    The manifest, and for every shard a dict of its arrays by field
+  """
+  with open(os.path.join(path, MANIFEST_FILE), "r") as file:
+    manifest = json.load(file)
+  assert manifest["schema_version"] == SCHEMA_VERSION, \
+    f"The dataset in {path} has schema version {manifest['schema_version']}, expected {SCHEMA_VERSION}"
+
+  # Shards can have grown since the manifest was read, only the rows it lists are complete
+  shards = [{field: np.load(_shard_path(path, shard["index"], field), mmap_mode=mmap_mode)[:shard["n_rows"]]
+             for field in manifest["fields"]} for shard in manifest["shards"]]
+  return manifest, shards
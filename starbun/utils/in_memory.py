@@ -0,0 +1,107 @@
+import openmc
+import openmc.lib
+from openmc.utility_funcs import change_directory
+
+def count_nuclides(materials: dict[str, openmc.Material]):
+  """Get the total number of nuclides of a set of materials"""
+  return sum(len(material.get_nuclides()) for material in materials.values())
+
+class InMemoryModel:
+  """An OpenMC model kept in memory with openmc.lib, to run many points that differ only in material compositions
+
+  Every model.run in a subprocess parses the XML and loads the cross sections of every nuclide again, which
+  dominates the wall time of short runs. Here the model of a family of points with the same geometry is
+  initialized once, and between points only the nuclide densities of its materials are changed in memory.
+
+  A point can reuse the loaded model if it belongs to the same family and every nuclide of each of its
+  materials is already in the corresponding loaded material, nuclides that are missing from the point get
+  density zero. Otherwise the model of the point has to be loaded with load, which replaces the loaded one.
+
+  Parameters
+  ----------
+  threads : int
+    Number of OpenMP threads
+  """
+
+  def __init__(self, threads: int = None):
+    self.threads = threads
+    self.family = None
+    self.model = None
+    self.nuclides = None
+
+  def compatible(self, family: str, materials: dict[str, openmc.Material]):
+    """Check if a point can be run by changing the densities of the loaded model
+
+    Parameters
+    ----------
+    family : str
+      Family of the point, points of the same family must have the same geometry and settings
+    materials : dict
+      Materials of the point by role, e.g. {'fuel': ..., 'water': ...}
+    """
+    if self.model is None or family != self.family:
+      return False
+    return all(role in materials and set(materials[role].get_nuclides()) <= set(nuclides)
+               for role, (_, nuclides) in self.nuclides.items())
+
+  def load(self, family: str, model: openmc.model.Model, materials: dict[str, openmc.Material], directory: str):
+    """Initialize openmc.lib with a model, the XML files are written to directory
+
+    Parameters
+    ----------
+    family : str
+      Family of the model
+    model : openmc.model.Model
+      The model
+    materials : dict
+      Materials of the model by role, materials that are not in the geometry are ignored
+    directory : str
+      Directory of the XML files
+    """
+    self.close()
+
+    material_ids = set(model.geometry.get_all_materials())
+    with change_directory(directory):
+      model.init_lib(threads=self.threads, output=False)
+
+    self.family = family
+    self.model = model
+    # The nuclides of every material in memory are fixed, so remember them in the order they were loaded
+    self.nuclides = {role: (material.id, material.get_nuclides()) for role, material in materials.items()
+                     if material.id in material_ids}
+
+  def update(self, materials: dict[str, openmc.Material]):
+    """Set the nuclide densities of the loaded materials to those of materials"""
+    for role, (material_id, nuclides) in self.nuclides.items():
+      densities = materials[role].get_nuclide_atom_densities()
+      openmc.lib.materials[material_id].set_densities(nuclides, [densities.get(nuclide, 0.0) for nuclide in nuclides])
+
+  def run(self, cwd_path: str, materials: dict[str, openmc.Material] = None):
+    """Run the loaded model, optionally with new materials, and get the path of the statepoint
+
+    Parameters
+    ----------
+    cwd_path : str
+      Directory of the statepoint and source files of the run
+    materials : dict
+      Materials of the point by role, see compatible. The densities of the previous run are kept if not given.
+    """
+    if materials is not None:
+      self.update(materials)
+
+    # Start from batch 1 with empty tallies and the initial seed, like a fresh process would
+    openmc.lib.hard_reset()
+    return self.model.run(cwd=cwd_path)
+
+  def close(self):
+    if self.model is not None:
+      self.model.finalize_lib()
+    self.family = None
+    self.model = None
+    self.nuclides = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
@@ -0,0 +1,99 @@
+import warnings
+
+import openmc
+import openmc.mgxs
+
+# Cross section types needed for a transport-corrected multigroup library
+MGXS_TYPES = ["nu-transport", "nu-fission", "fission", "nu-scatter matrix", "chi"]
+
+def xsdata_name(nuclide: str, role: str):
+  """Get the name of the multigroup data of a nuclide in the material with the given role"""
+  return f"{nuclide}_{role}"
+
+def build_library(geometry: openmc.Geometry, groups: str = "CASMO-8"):
+  """Create an MGXS library that tallies microscopic cross sections of every nuclide in every material of a geometry
+
+  Add the tallies to the continuous-energy reference run with library.add_to_tallies_file(tallies, merge=True),
+  and write the library after the run with export_library.
+
+  Parameters
+  ----------
+  geometry : openmc.Geometry
+    Geometry of the continuous-energy reference run
+  groups : str
+    Name of the energy group structure, see openmc.mgxs.GROUP_STRUCTURES
+
+  Returns
+  -------
+  openmc.mgxs.Library
+    The library, with its tallies built
+  """
+  library = openmc.mgxs.Library(geometry)
+  library.energy_groups = openmc.mgxs.EnergyGroups(groups)
+  library.mgxs_types = MGXS_TYPES
+  library.correction = "P0"
+  library.by_nuclide = True
+  library.domain_type = "material"
+  library.domains = list(geometry.get_all_materials().values())
+  library.build_library()
+  return library
+
+def export_library(library: openmc.mgxs.Library, statepoint_path: str, materials: dict[str, openmc.Material], path: str):
+  """Condense the tallies of the reference run into a microscopic multigroup cross section file
+
+  The cross sections of each nuclide of each material are stored under xsdata_name(nuclide, role), so
+  multigroup materials with other compositions can be made from the same file with mg_material.
+
+  Parameters
+  ----------
+  library : openmc.mgxs.Library
+    The library from build_library
+  statepoint_path : str
+    Statepoint of the reference run, with its summary.h5 in the same directory
+  materials : dict
+    Materials of the reference run by role, materials that are not in the geometry are left out
+  path : str
+    Path of the multigroup cross section file to write
+
+  Returns
+  -------
+  str
+    path
+  """
+  with openmc.StatePoint(statepoint_path) as statepoint:
+    library.load_from_statepoint(statepoint)
+
+  domain_ids = {domain.id for domain in library.domains}
+  mg_library = openmc.MGXSLibrary(library.energy_groups)
+  for role, material in materials.items():
+    if material.id not in domain_ids:
+      continue
+    for nuclide in material.get_nuclides():
+      mg_library.add_xsdata(library.get_xsdata(material, xsdata_name(nuclide, role), nuclide=nuclide, xs_type="micro"))
+
+  mg_library.export_to_hdf5(path)
+  return path
+
+def mg_material(material: openmc.Material, role: str):
+  """Create the multigroup version of a continuous-energy material, with the same nuclide densities
+
+  Parameters
+  ----------
+  material : openmc.Material
+    The continuous-energy material, its nuclides must be in the library for role
+  role : str
+    Role of the material in the reference run, e.g. 'uo2_ba'
+
+  Returns
+  -------
+  openmc.Material
+    The multigroup material
+  """
+  mg = openmc.Material(name=material.name)
+  with warnings.catch_warnings():
+    # The names are those of the multigroup data, which openmc warns are not nuclide names
+    warnings.simplefilter("ignore")
+    for nuclide, density in material.get_nuclide_atom_densities().items():
+      mg.add_nuclide(xsdata_name(nuclide, role), density)
+  mg.set_density("sum")
+  return mg
@@ -0,0 +1,182 @@
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from starbun.utils.input_data import ExperimentInputData
+
+# Bump to invalidate all existing entries when the key or entry format changes
+CACHE_VERSION = 1
+
+def cross_section_identity(cross_sections: str):
+  """Get a string identifying a cross section library
+
+  The identity is the resolved path of the cross_sections.xml file together with a hash of its contents,
+  so that pointing OPENMC_CROSS_SECTIONS to another library changes the identity. Regenerating the HDF5
+  files of a library in place does not change the identity, so invalidate the cache explicitly in that case.
+  """
+  if not cross_sections or not os.path.isfile(cross_sections):
+    return cross_sections
+
+  with open(cross_sections, "rb") as file:
+    digest = hashlib.sha256(file.read()).hexdigest()
+  return f"{os.path.realpath(cross_sections)}:{digest}"
+
+def physics_fields(inp: ExperimentInputData):
+  """Get the physics-relevant fields of an input data object as a dictionary
+
+  These are all dataclass fields except the bookkeeping fields of ExperimentInputData (experiment number and paths).
+  The cross section library is replaced by its identity, see cross_section_identity.
+  """
+  bookkeeping_fields = {field.name for field in dataclasses.fields(ExperimentInputData)}
+  fields = {}
+  for field in dataclasses.fields(inp):
+    if field.name in bookkeeping_fields:
+      continue
+    value = getattr(inp, field.name)
+    if field.name == "cross_sections":
+      value = cross_section_identity(value)
+    fields[field.name] = value
+  return fields
+
+class ResultCache:
+  """Content-addressed cache of simulation results keyed on the physics inputs
+
+  Each entry is a directory <path>/<key> holding a copy of the statepoint file and an entry.json file with
+  the keff and the experiment that produced it. Entries are never evicted implicitly unless max_entries or
+  max_age_days is given, in which case the least recently used entries are removed when storing a new one.
+
+  Parameters
+  ----------
+  path : str
+    Directory of the cache
+  max_entries : int
+    Maximum number of entries to keep, unlimited if None
+  max_age_days : float
+    Remove entries that have not been used for this many days, never if None
+  """
+
+  def __init__(self, path: str = "cache", max_entries: int = None, max_age_days: float = None):
+    self.path = path
+    self.max_entries = max_entries
+    self.max_age_days = max_age_days
+
+  def key(self, inp: ExperimentInputData, **extra):
+    """Get the cache key of an input data object
+
+    Parameters
+    ----------
+    inp : ExperimentInputData
+      The input data
+    **extra
+      Additional physics inputs that are not fields of inp, e.g. the BA pin positions
+
+    Returns
+    -------
+    str
+      A stable hexadecimal key
+    """
+    fields = physics_fields(inp)
+    fields.update(extra)
+    fields["_type"] = type(inp).__name__
+    fields["_version"] = CACHE_VERSION
+    serialized = json.dumps(fields, sort_keys=True, default=repr)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+  def _entry_path(self, key: str):
+    return os.path.join(self.path, key)
+
+  def get(self, key: str):
+    """Get the entry of a key, or None on a miss. A hit marks the entry as recently used."""
+    entry_file = os.path.join(self._entry_path(key), "entry.json")
+    try:
+      with open(entry_file, "r") as file:
+        entry = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+      return None
+
+    if not os.path.isfile(os.path.join(self._entry_path(key), entry["statepoint"])):
+      self.invalidate(key)
+      return None
+
+    os.utime(entry_file) # The modification time of entry.json is the last use
+    return entry
+
+  def put(self, key: str, statepoint_path: str, keff: float, keff_std: float, experiment: str):
+    """Store the result of a simulation under a key"""
+    entry_path = self._entry_path(key)
+    os.makedirs(entry_path, exist_ok=True)
+
+    # Write to temporary files and rename them, so that concurrent readers never see a partial entry
+    statepoint = os.path.basename(statepoint_path)
+    tmp_statepoint = os.path.join(entry_path, f".{statepoint}.{os.getpid()}")
+    shutil.copyfile(statepoint_path, tmp_statepoint)
+    os.replace(tmp_statepoint, os.path.join(entry_path, statepoint))
+
+    entry = {
+      "key": key,
+      "experiment": experiment,
+      "statepoint": statepoint,
+      "keff": keff,
+      "keff_std": keff_std,
+      "created": time.time(),
+    }
+    tmp_entry_file = os.path.join(entry_path, f".entry.json.{os.getpid()}")
+    with open(tmp_entry_file, "w") as file:
+      json.dump(entry, file, indent=2)
+    os.replace(tmp_entry_file, os.path.join(entry_path, "entry.json"))
+
+    self.evict()
+    return entry
+
+  def restore(self, entry: dict, cwd_path: str):
+    """Put the cached statepoint of an entry in a simulation directory, as if the simulation was run there"""
+    source = os.path.join(self._entry_path(entry["key"]), entry["statepoint"])
+    destination = os.path.join(cwd_path, entry["statepoint"])
+    if os.path.exists(destination):
+      os.remove(destination)
+    try:
+      os.link(source, destination)
+    except OSError:
+      shutil.copyfile(source, destination)
+    return destination
+
+  def invalidate(self, key: str):
+    """Remove the entry of a key"""
+    shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+  def clear(self):
+    """Remove all entries"""
+    for key in self.keys():
+      self.invalidate(key)
+
+  def keys(self):
+    """Get the keys of all entries"""
+    if not os.path.isdir(self.path):
+      return []
+    return [key for key in os.listdir(self.path) if os.path.isfile(os.path.join(self._entry_path(key), "entry.json"))]
+
+  def evict(self):
+    """Remove entries according to max_entries and max_age_days, least recently used first"""
+    if self.max_entries is None and self.max_age_days is None:
+      return
+
+    last_used = {}
+    for key in self.keys():
+      try:
+        last_used[key] = os.path.getmtime(os.path.join(self._entry_path(key), "entry.json"))
+      except FileNotFoundError:
+        pass # Removed by another process
+    keys = sorted(last_used, key=last_used.get, reverse=True)
+
+    if self.max_age_days is not None:
+      oldest_allowed = time.time() - self.max_age_days * 24 * 60 * 60
+      for key in [key for key in keys if last_used[key] < oldest_allowed]:
+        self.invalidate(key)
+        keys.remove(key)
+
+    if self.max_entries is not None:
+      for key in keys[self.max_entries:]:
+        self.invalidate(key)
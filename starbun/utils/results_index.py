@@ -0,0 +1,220 @@
+import glob
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+from typing import Callable
+
+import yaml
+
+import starbun.utils.convergence
+import starbun.utils.statepoint
+
+def find_statepoint(cwd_path: str):
+  """Get the path of the statepoint of the last batch in a simulation directory, or None if there is none"""
+  statepoints = glob.glob(os.path.join(cwd_path, "statepoint.*.h5"))
+  if not statepoints:
+    return None
+  return max(statepoints, key=lambda path: int(re.search(r"statepoint\.(\d+)\.h5$", path).group(1)))
+
+def read_statepoint(statepoint_path: str):
+  """Read the keff, its standard deviation, the total runtime, the number of batches and the source convergence of a statepoint"""
+  results = starbun.utils.statepoint.read(statepoint_path, ["keff", "runtime", "current_batch"])
+  results["n_batches"] = results.pop("current_batch")
+  results.update(starbun.utils.convergence.check_convergence(statepoint_path))
+  return results
+
+def read_sensitivities(experiment_path: str):
+  """Read the keff sensitivities of an experiment from results/sensitivity.yaml, see starbun.utils.sensitivity"""
+  sensitivity_path = os.path.join(experiment_path, "results", "sensitivity.yaml")
+  if not os.path.isfile(sensitivity_path):
+    return {}
+  with open(sensitivity_path, "r") as file:
+    parameters = yaml.safe_load(file)["parameters"]
+
+  results = {}
+  for parameter, sensitivity in parameters.items():
+    if sensitivity is not None:
+      results[f"dk_d{parameter}"] = sensitivity["value"]
+      results[f"dk_d{parameter}_std"] = sensitivity["std"]
+  return results
+
+def _ingest(task):
+  experiment_path, statepoint_path = task
+  with open(os.path.join(experiment_path, "input_data.yaml"), "r") as file:
+    # dataclass_wizard dumps the keys in lisp-case
+    inputs = {key.replace("-", "_"): value for key, value in yaml.safe_load(file).items()}
+  results = {}
+  if statepoint_path is not None:
+    results = read_statepoint(statepoint_path)
+    results.update(read_sensitivities(experiment_path))
+  return inputs, results
+
+class ResultsIndex:
+  """Persistent SQLite index of the inputs and results of all experiments
+
+  The index records the inputs, keff, its standard deviation, runtime, number of batches, fission source
+  convergence and keff sensitivities (if tallied) of every experiment, together with the modification times of its input_data.yaml and statepoint
+  files. update only reads the experiments that are new or changed since the last update.
+
+  Parameters
+  ----------
+  path : str
+    Path of the SQLite database, created if it does not exist
+  """
+
+  # Result columns and their SQLite types
+  RESULT_COLUMNS = {
+    "keff": "REAL",
+    "keff_std": "REAL",
+    "runtime": "REAL",
+    "n_batches": "INTEGER",
+    "n_inactive": "INTEGER",
+    "entropy_converged_batch": "INTEGER",
+    "source_converged": "INTEGER",
+    "dk_dba_pct": "REAL",
+    "dk_dba_pct_std": "REAL",
+    "dk_denrichment_pct": "REAL",
+    "dk_denrichment_pct_std": "REAL",
+  }
+  COLUMNS = list(RESULT_COLUMNS)
+
+  def __init__(self, path: str = "results_index.sqlite"):
+    self.path = path
+    self.connection = sqlite3.connect(path)
+    self.connection.execute("""
+      CREATE TABLE IF NOT EXISTS experiments (
+        experiment TEXT PRIMARY KEY,
+        input_mtime REAL NOT NULL,
+        statepoint TEXT,
+        statepoint_mtime REAL,
+        inputs TEXT NOT NULL
+      )""")
+
+    # Add result columns missing from an index created by an older version, and re-ingest everything to fill them
+    existing_columns = {row[1] for row in self.connection.execute("PRAGMA table_info(experiments)")}
+    missing_columns = [column for column in self.COLUMNS if column not in existing_columns]
+    for column in missing_columns:
+      self.connection.execute(f"ALTER TABLE experiments ADD COLUMN {column} {self.RESULT_COLUMNS[column]}")
+    if missing_columns:
+      self.connection.execute("UPDATE experiments SET input_mtime = -1")
+    self.connection.commit()
+
+  def close(self):
+    self.connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def update(self, experiments_path: str = "experiments", processes: int = 1):
+    """Ingest the experiments that are new or changed since the last update
+
+    Parameters
+    ----------
+    experiments_path : str
+      Directory holding one directory per experiment
+    processes : int
+      Number of processes reading the new experiments
+
+    Returns
+    -------
+    int
+      The number of ingested experiments
+    """
+    known = {experiment: (input_mtime, statepoint, statepoint_mtime) for experiment, input_mtime, statepoint, statepoint_mtime
+             in self.connection.execute("SELECT experiment, input_mtime, statepoint, statepoint_mtime FROM experiments")}
+
+    experiment_paths = {}
+    tasks = []
+    for experiment_path in sorted(glob.glob(os.path.join(experiments_path, "*"))):
+      input_path = os.path.join(experiment_path, "input_data.yaml")
+      if not os.path.isfile(input_path):
+        continue
+      experiment = os.path.basename(experiment_path)
+      experiment_paths[experiment] = experiment_path
+
+      statepoint_path = find_statepoint(os.path.join(experiment_path, "cwd"))
+      state = (os.path.getmtime(input_path), statepoint_path,
+               os.path.getmtime(statepoint_path) if statepoint_path is not None else None)
+      if known.get(experiment) != state:
+        tasks.append((experiment, state))
+
+    # Forget experiments that have been removed
+    removed = [(experiment,) for experiment in known if experiment not in experiment_paths]
+    self.connection.executemany("DELETE FROM experiments WHERE experiment = ?", removed)
+
+    ingest_tasks = [(experiment_paths[experiment], state[1]) for experiment, state in tasks]
+    if processes > 1 and len(ingest_tasks) > 1:
+      with multiprocessing.Pool(processes=processes) as pool:
+        ingested = pool.map(_ingest, ingest_tasks)
+    else:
+      ingested = [_ingest(task) for task in ingest_tasks]
+
+    rows = []
+    for (experiment, (input_mtime, statepoint, statepoint_mtime)), (inputs, results) in zip(tasks, ingested):
+      rows.append((experiment, input_mtime, statepoint, statepoint_mtime, json.dumps(inputs),
+                   *[results.get(column) for column in self.COLUMNS]))
+    self.connection.executemany(f"""
+      INSERT OR REPLACE INTO experiments (experiment, input_mtime, statepoint, statepoint_mtime, inputs, {", ".join(self.COLUMNS)})
+      VALUES (?, ?, ?, ?, ?, {", ".join("?" * len(self.COLUMNS))})""", rows)
+    self.connection.commit()
+
+    return len(rows)
+
+  def to_dataframe(self, with_results_only: bool = True):
+    """Get the index as a pandas DataFrame with one column per input and result
+
+    Parameters
+    ----------
+    with_results_only : bool
+      Leave out experiments without a statepoint, e.g. ones that are still running
+    """
+    import pandas as pd
+
+    query = f"SELECT experiment, inputs, {', '.join(self.COLUMNS)} FROM experiments"
+    if with_results_only:
+      query += " WHERE keff IS NOT NULL"
+
+    records = []
+    for experiment, inputs, *results in self.connection.execute(query):
+      record = json.loads(inputs)
+      record["experiment"] = experiment
+      record.update(zip(self.COLUMNS, results))
+      records.append(record)
+
+    return pd.DataFrame.from_records(records)
+
+  def training_rows(self, exclude=(), get_layout: Callable = None):
+    """Get the continuous-energy experiments with a layout, e.g. to train a model of keff on
+
+    Multi-group experiments are left out, since their keff has a bias against continuous-energy ones.
+
+    Parameters
+    ----------
+    exclude : collection
+      Experiments to leave out, e.g. the ones that have already been used
+    get_layout : callable
+      Function getting the layout from a row of to_dataframe(), e.g. to fill in the default layout of a lab.
+      Defaults to the 'layout' input, rows where it returns None are left out.
+
+    Returns
+    -------
+    tuple
+      The rows as a pandas DataFrame, and the list of their layouts
+    """
+    data = self.to_dataframe()
+    if data.empty:
+      return data, []
+    if "energy_mode" in data:
+      data = data[data["energy_mode"].fillna("continuous-energy") == "continuous-energy"]
+    data = data[~data["experiment"].isin(exclude)]
+
+    if get_layout is None:
+      get_layout = lambda row: row.get("layout") if isinstance(row.get("layout"), str) else None
+    layouts = [get_layout(row) for _, row in data.iterrows()]
+    data = data[[layout is not None for layout in layouts]]
+    return data, [layout for layout in layouts if layout is not None]
@@ -0,0 +1,144 @@
+import math
+from typing import Callable
+
+import openmc
+
+# Scores whose ratio is keff in an infinite lattice, k = nu-fission/absorption
+SCORES = ["nu-fission", "absorption"]
+
+def _tally_name(role: str, variable: str):
+  return f"sensitivity {role} {variable}"
+
+def derivative_tallies(materials: dict[str, openmc.Material]):
+  """Create tallies of the keff of an infinite lattice and its derivatives with respect to material compositions
+
+  keff is taken as the ratio of the neutron production and absorption rates, which holds without leakage, e.g.
+  for an assembly with reflective boundaries. For every material there is a derivative with respect to its
+  density, and with respect to the density of each of its nuclides, see read_sensitivities.
+
+  OpenMC derivative tallies are first-order and leave out the perturbation of the fission source: they are
+  the change of the rates with the source held at its unperturbed distribution. For a strong local absorber
+  like Gd, which depresses the flux and the fission source around the BA pins, the source term is not small,
+  so dk/d(ba_pct) from these tallies is not the full derivative and can differ markedly from the difference
+  of two runs.
+
+  Parameters
+  ----------
+  materials : dict
+    Materials by role, e.g. {'uo2_ba': ...}. They must be in the geometry of the run.
+
+  Returns
+  -------
+  openmc.Tallies
+    The tallies, to add to the tallies of the model
+  """
+  tallies = openmc.Tallies()
+
+  base_tally = openmc.Tally(name=_tally_name("base", "none"))
+  base_tally.scores = SCORES
+  tallies.append(base_tally)
+
+  for role, material in materials.items():
+    variables = [("density", openmc.TallyDerivative(variable="density", material=material.id))]
+    variables += [(nuclide, openmc.TallyDerivative(variable="nuclide_density", material=material.id, nuclide=nuclide))
+                  for nuclide in material.get_nuclides()]
+    for variable, derivative in variables:
+      tally = openmc.Tally(name=_tally_name(role, variable))
+      tally.scores = SCORES
+      tally.derivative = derivative
+      tallies.append(tally)
+
+  return tallies
+
+def _ratio_derivative(production, absorption, production_derivative, absorption_derivative):
+  # k = P/A, dk = (P' A - P A')/A^2. The four tallies come from the same histories and are correlated, with
+  # signs that depend on the nuclide, but the statepoint has no per-batch tallies to estimate the covariance.
+  # The uncertainties are therefore propagated as if independent, which can over- or underestimate the std.
+  (p, p_std), (a, a_std), (dp, dp_std), (da, da_std) = production, absorption, production_derivative, absorption_derivative
+  value = dp / a - p * da / a**2
+  std = math.sqrt((dp_std / a)**2 + (p * da_std / a**2)**2 + (da / a**2 * p_std)**2 + ((dp / a**2 - 2 * p * da / a**3) * a_std)**2)
+  return value, std
+
+def read_sensitivities(statepoint_path: str, materials: dict[str, openmc.Material]):
+  """Get the first-order keff sensitivities from the tallies of derivative_tallies
+
+  Parameters
+  ----------
+  statepoint_path : str
+    Statepoint of a run with the tallies of derivative_tallies
+  materials : dict
+    The materials by role passed to derivative_tallies
+
+  Returns
+  -------
+  dict
+    For every role a dict with the first-order derivative of keff with respect to 'density' (per g/cm3) and
+    each nuclide (per atom/b-cm) as (value, approximate standard deviation), see derivative_tallies
+  """
+  with openmc.StatePoint(statepoint_path, autolink=False) as statepoint:
+    def read(role, variable):
+      tally = statepoint.get_tally(name=_tally_name(role, variable))
+      return [(float(tally.mean.flat[i]), float(tally.std_dev.flat[i])) for i in range(len(SCORES))]
+
+    production, absorption = read("base", "none")
+    sensitivities = {}
+    for role, material in materials.items():
+      sensitivities[role] = {variable: _ratio_derivative(production, absorption, *read(role, variable))
+                             for variable in ["density"] + material.get_nuclides()}
+  return sensitivities
+
+def composition_gradient(factory: Callable[[float], openmc.Material], x: float, step: float):
+  """Get the derivative of the nuclide densities of a material with respect to a parameter of its factory
+
+  Parameters
+  ----------
+  factory : callable
+    Function creating the material for a parameter value, e.g. lambda x: fuels.uo2(gd2o3_pct=x)
+  x : float
+    The parameter value
+  step : float
+    Step of the central difference, a forward difference is used if x - step < 0
+
+  Returns
+  -------
+  dict
+    Derivative of the density of each nuclide in atom/b-cm per unit of x
+  """
+  lower = max(x - step, 0.0)
+  upper = x + step
+  lower_densities = factory(lower).get_nuclide_atom_densities()
+  upper_densities = factory(upper).get_nuclide_atom_densities()
+  return {nuclide: (upper_densities.get(nuclide, 0.0) - lower_densities.get(nuclide, 0.0)) / (upper - lower)
+          for nuclide in set(lower_densities) | set(upper_densities)}
+
+def parameter_sensitivity(sensitivities: dict[str, dict[str, tuple[float, float]]], gradients: dict[str, dict[str, float]]):
+  """Combine nuclide sensitivities and composition gradients into the sensitivity of keff to a parameter
+
+  Parameters
+  ----------
+  sensitivities : dict
+    Sensitivities by role, see read_sensitivities
+  gradients : dict
+    Composition gradient of each role that depends on the parameter, see composition_gradient. Roles without
+    sensitivities are not in the geometry and do not contribute.
+
+  Returns
+  -------
+  tuple of float or None
+    dk/dx and its standard deviation, or None if a nuclide that changes with x has no sensitivity, e.g. Gd in
+    a fuel without Gd
+  """
+  value = 0.0
+  variance = 0.0
+  for role, gradient in gradients.items():
+    if role not in sensitivities:
+      continue
+    for nuclide, dn_dx in gradient.items():
+      if dn_dx == 0.0:
+        continue
+      if nuclide not in sensitivities[role]:
+        return None
+      dk_dn, dk_dn_std = sensitivities[role][nuclide]
+      value += dk_dn * dn_dx
+      variance += (dk_dn_std * dn_dx)**2
+  return value, math.sqrt(variance)
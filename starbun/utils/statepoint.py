@@ -0,0 +1,75 @@
+import multiprocessing
+
+import h5py
+import numpy as np
+
+# Quantities that can be read, and the statepoint datasets they are read from
+DATASETS = {
+  "keff": "k_combined",
+  "runtime": "runtime/total",
+  "k_generation": "k_generation",
+  "entropy": "entropy",
+  "n_batches": "n_batches",
+  "current_batch": "current_batch",
+  "n_inactive": "n_inactive",
+  "n_particles": "n_particles",
+  "generations_per_batch": "generations_per_batch",
+}
+
+def read(statepoint_path: str, names: list[str] = ("keff", "runtime")):
+  """Read scalars and arrays directly from a statepoint file, without openmc.StatePoint
+
+  Only the requested datasets are read, so neither openmc, the summary file nor the tallies are loaded.
+
+  Parameters
+  ----------
+  statepoint_path : str
+    Path of the statepoint HDF5 file
+  names : list of str
+    Quantities to read, keys of DATASETS. 'keff' gives both 'keff' and 'keff_std'.
+
+  Returns
+  -------
+  dict
+    The requested quantities. Quantities missing from the file (e.g. 'entropy' if no entropy mesh was used) are None.
+  """
+  values = {}
+  with h5py.File(statepoint_path, "r") as file:
+    for name in names:
+      dataset = DATASETS[name]
+      value = file[dataset][()] if dataset in file else None
+      if name == "keff":
+        values["keff"], values["keff_std"] = (float(value[0]), float(value[1])) if value is not None else (None, None)
+      elif isinstance(value, np.ndarray) and value.ndim > 0:
+        values[name] = value
+      elif value is not None:
+        values[name] = value.item()
+      else:
+        values[name] = None
+  return values
+
+def _read(task):
+  return read(*task)
+
+def read_many(statepoint_paths: list[str], names: list[str] = ("keff", "runtime"), processes: int = 1):
+  """Read the same quantities from many statepoint files, see read
+
+  Parameters
+  ----------
+  statepoint_paths : list of str
+    Paths of the statepoint HDF5 files
+  names : list of str
+    Quantities to read
+  processes : int
+    Number of processes reading the files
+
+  Returns
+  -------
+  list of dict
+    The quantities of each file, in the order of statepoint_paths
+  """
+  tasks = [(statepoint_path, names) for statepoint_path in statepoint_paths]
+  if processes > 1 and len(tasks) > 1:
+    with multiprocessing.Pool(processes=processes) as pool:
+      return pool.map(_read, tasks, chunksize=max(len(tasks) // (4 * processes), 1))
+  return [_read(task) for task in tasks]
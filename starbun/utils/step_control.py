@@ -0,0 +1,71 @@
+import numpy as np
+
+def next_time_step(time: np.ndarray, keff: np.ndarray, keff_std: np.ndarray, absorber: np.ndarray, dt_min: float, dt_max: float,
+                   end_time: float, tolerance_keff: float = 0.002, tolerance_absorber: float = 0.1, growth: float = 2.0, safety: float = 0.9):
+  """Choose the next depletion time step from the change in keff and absorber amount over the last steps
+
+  The error of a step is driven by how far keff and the compositions are from changing linearly over it.
+  For keff this is estimated by the deviation of the last keff from the straight line through the two before,
+  which scales with the square of the step, and the step is chosen so that the deviation is at most
+  tolerance_keff. Deviations within two standard deviations are taken as noise, so statistics alone do
+  not shorten the steps. The absorber amount may change by at most tolerance_absorber times its initial
+  amount per step, so the steps are short while the absorber burns out and long once it is gone.
+  Steps grow by at most a factor growth per step.
+
+  Parameters
+  ----------
+  time : np.ndarray
+    Times of the depletion results so far, with the start of the first step first, in s
+  keff : np.ndarray
+    keff at each time
+  keff_std : np.ndarray
+    Standard deviation of keff at each time
+  absorber : np.ndarray
+    Amount of the burnable absorber at each time, e.g. the number of Gd155 and Gd157 atoms
+  dt_min : float
+    Shortest step in s, also the first step
+  dt_max : float
+    Longest step in s
+  end_time : float
+    Time at which to stop in s
+  tolerance_keff : float
+    Largest deviation of keff from a linear change over a step
+  tolerance_absorber : float
+    Largest change of the absorber amount per step, relative to the initial amount
+  growth : float
+    Largest ratio between a step and the previous one
+  safety : float
+    Factor applied to the step that just meets the tolerances
+
+  Returns
+  -------
+  float or None
+    The next time step in s, or None if end_time has been reached
+  """
+  remaining = end_time - time[-1]
+  if remaining <= 1e-6 * max(end_time, 1.0):
+    return None
+  if len(time) < 2:
+    return min(dt_min, remaining)
+
+  dt_previous = time[-1] - time[-2]
+  dt = growth * dt_previous
+
+  if len(time) >= 3:
+    slope = (keff[-2] - keff[-3]) / (time[-2] - time[-3])
+    deviation = abs(keff[-1] - (keff[-2] + slope * dt_previous))
+    noise = 2 * np.sqrt(keff_std[-1]**2 + keff_std[-2]**2 + keff_std[-3]**2)
+    if deviation > noise:
+      dt = min(dt, safety * dt_previous * np.sqrt(tolerance_keff / (deviation - noise)))
+
+  if absorber[0] > 0:
+    absorber_change = abs(absorber[-1] - absorber[-2]) / absorber[0]
+    if absorber_change > 0:
+      dt = min(dt, safety * tolerance_absorber * dt_previous / absorber_change)
+
+  dt = min(max(dt, dt_min), dt_max)
+
+  # Take the last bit in one go, rather than ending with a tiny step, or in two equal steps if one would be longer than dt_max
+  if dt >= remaining or remaining - dt < dt_min:
+    dt = remaining if remaining <= dt_max else remaining / 2
+  return dt
@@ -0,0 +1,143 @@
+import math
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+@dataclass
+class SweepPointResult:
+  index: int
+  point: Any
+  result: Any
+  wall_time: float
+
+def get_cpu_count():
+  """Get the number of cores available to this process"""
+  try:
+    return len(os.sched_getaffinity(0))
+  except AttributeError:
+    try:
+      return multiprocessing.cpu_count()
+    except NotImplementedError:
+      return 1 # arbitrary default
+
+def choose_split(n_points: int, cpu_count: int = None, serial_fraction: float = 0.8, max_processes: int = None):
+  """Choose how to split the cores between concurrent runs and OpenMP threads per run
+
+  The wall time of a single run using t threads is modelled with Amdahl's law,
+  T(t) = s + (1 - s)/t, where s is the fraction of the run that does not scale with threads
+  (cross section loading, XML parsing, geometry initialization). Short runs with few particles
+  are dominated by this startup, so s is close to 1. The split that gives the shortest total
+  sweep time, i.e. the highest total throughput, is returned.
+
+  Parameters
+  ----------
+  n_points : int
+    Number of points in the sweep
+  cpu_count : int
+    Number of cores to split, defaults to all cores available to this process
+  serial_fraction : float
+    Fraction of the wall time of a single-threaded run that does not scale with threads
+  max_processes : int
+    Upper limit on the number of concurrent runs, e.g. to fit the cross sections of each run in memory
+
+  Returns
+  -------
+  tuple of int
+    The number of concurrent runs (processes) and the number of threads per run
+  """
+  if cpu_count is None:
+    cpu_count = get_cpu_count()
+  n_points = max(n_points, 1)
+
+  best_split = (1, cpu_count)
+  best_sweep_time = math.inf
+  for threads in range(1, cpu_count + 1):
+    processes = min(cpu_count // threads, n_points)
+    if max_processes is not None:
+      processes = min(processes, max_processes)
+    if processes < 1:
+      continue
+
+    # Every wave of concurrent runs takes the time of one run
+    run_time = serial_fraction + (1 - serial_fraction) / threads
+    sweep_time = math.ceil(n_points / processes) * run_time
+
+    # Only use more threads if it is strictly better, as fewer threads per run are less sensitive to a bad serial_fraction
+    if sweep_time < best_sweep_time - 1e-12:
+      best_split = (processes, threads)
+      best_sweep_time = sweep_time
+
+  return best_split
+
+def _run_point(task):
+  run_point, index, point, threads = task
+  start_time = time.perf_counter()
+  result = run_point(point, threads)
+  return SweepPointResult(index, point, result, time.perf_counter() - start_time)
+
+def run_sweep(points: Iterable, run_point: Callable[[Any, int], Any], processes: int = None, threads: int = None,
+              serial_fraction: float = 0.8, max_processes: int = None):
+  """Run the points of a parameter sweep concurrently in a process pool
+
+  Parameters
+  ----------
+  points : iterable
+    The sweep points, e.g. InputData objects. Must be picklable.
+  run_point : callable
+    Function called as run_point(point, threads) in a worker process, e.g. a function that
+    builds the model and calls model.run(threads=threads). Must be defined at module level.
+  processes : int
+    Number of concurrent runs, chosen with choose_split if not given
+  threads : int
+    Number of OpenMP threads per run, chosen with choose_split if not given
+  serial_fraction : float
+    See choose_split
+  max_processes : int
+    See choose_split
+
+  Returns
+  -------
+  list of SweepPointResult
+    The return value and wall time of each point, in the order of points
+  """
+  points = list(points)
+  n_points = len(points)
+
+  if processes is None or threads is None:
+    auto_processes, auto_threads = choose_split(n_points, serial_fraction=serial_fraction, max_processes=max_processes)
+    if processes is None and threads is None:
+      processes, threads = auto_processes, auto_threads
+    elif processes is None:
+      processes = max(min(get_cpu_count() // threads, n_points), 1)
+    else:
+      threads = max(get_cpu_count() // processes, 1)
+
+  print(f"Running {n_points} sweep points with {processes} concurrent runs of {threads} threads each")
+
+  tasks = [(run_point, index, point, threads) for index, point in enumerate(points)]
+  results = []
+
+  def report(result: SweepPointResult):
+    results.append(result)
+    print(f"[{len(results)}/{n_points}] Sweep point {result.index} finished in {result.wall_time:.1f} s")
+
+  start_time = time.perf_counter()
+  if processes == 1:
+    for task in tasks:
+      report(_run_point(task))
+  else:
+    with multiprocessing.Pool(processes=processes) as pool:
+      for result in pool.imap_unordered(_run_point, tasks):
+        report(result)
+  sweep_time = time.perf_counter() - start_time
+
+  results.sort(key=lambda result: result.index)
+
+  if results:
+    wall_times = [result.wall_time for result in results]
+    print(f"Sweep finished in {sweep_time:.1f} s, wall time per point: "
+          f"mean {sum(wall_times)/len(wall_times):.1f} s, min {min(wall_times):.1f} s, max {max(wall_times):.1f} s")
+
+  return results
@@ -1,18 +1,94 @@
-def get_tracker_value(increase: bool):
-  # Open the file in read mode
-  try:
-    with open("tracker", "r") as file:
-      value = int(file.read())
-      if increase: value += 1 # Increment the value by 1
-  except FileNotFoundError:
-    value = 0 # If the file doesn't exist, create it with value 0
-
-  # Open the file in write mode and write the updated value
-  with open("tracker", "w") as file:
+import contextlib
+import os
+
+try:
+  import fcntl
+except ImportError: # Windows
+  fcntl = None
+  import msvcrt
+
+TRACKER_FILE = "tracker"
+
+@contextlib.contextmanager
+def locked(path: str):
+  """Hold an exclusive lock on path for the duration of a with block, across processes
+
+  The lock is taken on a separate file <path>.lock, so that the file at path itself can be replaced atomically
+  while the lock is held, e.g. with os.replace.
+  """
+  with open(f"{path}.lock", "a+") as lock_file:
+    if fcntl is not None:
+      fcntl.flock(lock_file, fcntl.LOCK_EX)
+    else:
+      lock_file.seek(0)
+      while True:
+        try:
+          msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+          break
+        except OSError:
+          pass # LK_LOCK gives up after 10 seconds, keep waiting
+    try:
+      yield
+    finally:
+      if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+      else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _read(path: str):
+  with open(path, "r") as file:
+    return int(file.read())
+
+def _write(path: str, value: int):
+  # Write to a temporary file and rename it, so that the tracker file is never seen half-written
+  tmp_path = f"{path}.{os.getpid()}.tmp"
+  with open(tmp_path, "w") as file:
     file.write(str(value))
+  os.replace(tmp_path, path)
+
+def reserve_tracker_values(n: int, path: str = TRACKER_FILE):
+  """Reserve a block of n consecutive experiment numbers
+
+  The read-modify-write of the tracker file is done under an exclusive file lock, so concurrent
+  processes (e.g. several shells or a batch submitter and its workers) never get the same number.
+
+  Parameters
+  ----------
+  n : int
+    Number of experiment numbers to reserve
+  path : str
+    Path of the tracker file
+
+  Returns
+  -------
+  list of str
+    The reserved experiment numbers, formatted with format_tracker_value
+  """
+  assert n >= 1, "At least one experiment number must be reserved"
+  with locked(path):
+    try:
+      first = _read(path) + 1
+    except FileNotFoundError:
+      first = 0 # If the file doesn't exist, start at 0
+    last = first + n - 1
+    _write(path, last)
+
+  return [format_tracker_value(value) for value in range(first, last + 1)]
+
+def get_tracker_value(increase: bool, path: str = TRACKER_FILE):
+  if increase:
+    return reserve_tracker_values(1, path)[0]
+
+  with locked(path):
+    try:
+      value = _read(path)
+    except FileNotFoundError:
+      value = 0 # If the file doesn't exist, create it with value 0
+      _write(path, value)
 
   return format_tracker_value(value)
 
 def format_tracker_value(value):
   # Return the padded value with 6 digits
-  return str(value).zfill(6)
\ No newline at end of file
+  return str(value).zfill(6)
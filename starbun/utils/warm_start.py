@@ -0,0 +1,127 @@
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+from typing import Any, Callable
+
+def find_source(cwd_path: str):
+  """Get the path of the source bank of the last batch in a simulation directory, or None if there is none"""
+  sources = glob.glob(os.path.join(cwd_path, "source.*.h5"))
+  if not sources:
+    return None
+  return max(sources, key=lambda path: int(re.search(r"source\.(\d+)\.h5$", path).group(1)))
+
+class SourceRegistry:
+  """Registry of the final fission source banks of finished runs, to warm-start similar runs
+
+  Runs are grouped in families, e.g. all points of a sweep with the same geometry and layout, and placed
+  within a family by numeric parameters, e.g. the BA percentage. Every finished run is an entry
+  <path>/<family hash>/<experiment>.json, so concurrent runs in a process pool can register and look up
+  sources without a shared index.
+
+  Parameters
+  ----------
+  path : str
+    Directory of the registry
+  """
+
+  def __init__(self, path: str = "warm_start"):
+    self.path = path
+
+  def _family_path(self, family: str):
+    return os.path.join(self.path, hashlib.sha256(family.encode()).hexdigest()[:16])
+
+  def register(self, family: str, parameters: dict[str, float], source_path: str, experiment: str):
+    """Register the final source bank of a finished run"""
+    family_path = self._family_path(family)
+    os.makedirs(family_path, exist_ok=True)
+    entry = {
+      "family": family,
+      "parameters": parameters,
+      "source": os.path.abspath(source_path),
+      "experiment": experiment,
+    }
+    tmp_entry_file = os.path.join(family_path, f".{experiment}.json.{os.getpid()}")
+    with open(tmp_entry_file, "w") as file:
+      json.dump(entry, file, indent=2)
+    os.replace(tmp_entry_file, os.path.join(family_path, f"{experiment}.json"))
+
+  def nearest(self, family: str, parameters: dict[str, float], scales: dict[str, float] = None):
+    """Get the registered run of a family that is nearest in parameter space
+
+    Parameters
+    ----------
+    family : str
+      The family of the new run
+    parameters : dict
+      The parameters of the new run
+    scales : dict
+      Typical size of each parameter, distances are measured in these units. Defaults to 1 for all parameters.
+
+    Returns
+    -------
+    dict or None
+      The entry with 'source', 'experiment', 'parameters' and 'distance', or None if the family has no runs yet
+    """
+    scales = scales or {}
+    nearest_entry = None
+    for entry_file in glob.glob(os.path.join(self._family_path(family), "*.json")):
+      try:
+        with open(entry_file, "r") as file:
+          entry = json.load(file)
+      except (FileNotFoundError, json.JSONDecodeError):
+        continue
+      if entry["family"] != family or not os.path.isfile(entry["source"]):
+        continue
+
+      entry["distance"] = math.sqrt(sum(((value - entry["parameters"][name]) / scales.get(name, 1.0))**2
+                                        for name, value in parameters.items()))
+      if nearest_entry is None or entry["distance"] < nearest_entry["distance"]:
+        nearest_entry = entry
+    return nearest_entry
+
+def order_for_warm_start(points: list, family: Callable[[Any], str], parameters: Callable[[Any], dict[str, float]]):
+  """Order sweep points so that most runs can warm-start from a finished neighbour
+
+  Within a family, points are ordered along a nearest-neighbour path starting at the smallest parameters,
+  so every point follows a close one. Families are interleaved round-robin, so that runs started at the
+  same time in a process pool belong to different families and do not all start cold.
+
+  Parameters
+  ----------
+  points : list
+    The sweep points
+  family : callable
+    Function giving the family of a point
+  parameters : callable
+    Function giving the parameters of a point
+
+  Returns
+  -------
+  list
+    The points in the new order
+  """
+  families = {}
+  for point in points:
+    families.setdefault(family(point), []).append(point)
+
+  def distance(point_a, point_b):
+    parameters_a, parameters_b = parameters(point_a), parameters(point_b)
+    return math.sqrt(sum((parameters_a[name] - parameters_b[name])**2 for name in parameters_a))
+
+  chains = []
+  for family_points in families.values():
+    remaining = sorted(family_points, key=lambda point: tuple(parameters(point).values()))
+    chain = [remaining.pop(0)]
+    while remaining:
+      next_point = min(remaining, key=lambda point: distance(chain[-1], point))
+      remaining.remove(next_point)
+      chain.append(next_point)
+    chains.append(chain)
+
+  ordered = []
+  for i in range(max((len(chain) for chain in chains), default=0)):
+    ordered += [chain[i] for chain in chains if i < len(chain)]
+  return ordered